@@ -0,0 +1,55 @@
+"""This module implements bfloat16 CPU inference of generators (option '--bf16').
+
+The generator keeps its fp32 weights and runs under torch.autocast('cpu', dtype=torch.bfloat16), which computes the
+convolutions in bfloat16 and keeps the numerically sensitive ops (e.g. normalization) in fp32.
+bfloat16 is only faster on CPUs with native support (AVX512-BF16 or AMX); on other CPUs it is emulated and slower,
+so the generator stays in fp32 there.
+
+An accuracy guard compares the bfloat16 outputs with the fp32 outputs on the calibration images (PSNR / SSIM)
+and keeps fp32 if they differ too much. Every style is checked on its own, as the error depends on the weights.
+"""
+import torch
+from util import util
+from .quantization import load_calibration_images, run_batches
+
+
+def cpu_supports_bf16():
+    """Return True if the CPU has native bfloat16 instructions (AVX512-BF16 or AMX)"""
+    cpu = getattr(torch, 'cpu', None)
+    if hasattr(cpu, '_is_avx512_bf16_supported') and hasattr(cpu, '_is_amx_tile_supported'):
+        return cpu._is_avx512_bf16_supported() or cpu._is_amx_tile_supported()
+    try:  # older PyTorch: read the CPU flags (Linux only)
+        with open('/proc/cpuinfo') as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
+
+def autocast(enabled=True):
+    """Return the context manager running CPU ops in bfloat16 (a no-op if not enabled)"""
+    return torch.autocast('cpu', dtype=torch.bfloat16, enabled=enabled)
+
+
+def validate_bf16(net, opt):
+    """Check whether a generator is accurate enough in bfloat16
+
+    Parameters:
+        net (nn.Module)    -- the fp32 generator with its weights loaded
+        opt (Option class) -- opt.calibration_dir holds the validation images;
+                              opt.bf16_min_psnr and opt.bf16_min_ssim are the accuracy thresholds
+
+    Returns True if the generator can run in bfloat16.
+    """
+    net.eval()
+    images = load_calibration_images(opt)
+    reference = run_batches(net, images)
+    with autocast():
+        output = run_batches(net, images).float()
+    psnr, ssim = util.psnr(reference, output), util.ssim(reference, output)
+    print('bfloat16 generator: PSNR = %.2f dB, SSIM = %.4f (against fp32)' % (psnr, ssim))
+    if psnr < opt.bf16_min_psnr or ssim < opt.bf16_min_ssim:
+        print('bfloat16 generator is below the accuracy thresholds (PSNR %.2f dB, SSIM %.4f); using fp32' %
+              (opt.bf16_min_psnr, opt.bf16_min_ssim))
+        return False
+    return True
@@ -0,0 +1,79 @@
+"""This module loads test-time generators quickly.
+
+The usual path builds the generator with random weights (<networks.init_weights>), unpickles the checkpoint and
+patches its keys (<BaseModel.__patch_instance_norm_state_dict>) before copying the weights over the random ones.
+Here instead:
+    -- the generator is built on the 'meta' device: its tensors have shapes but no storage, so nothing is allocated
+       or initialized;
+    -- the patched state dict is cached next to the checkpoint as [epoch]_net_G[model_suffix]_patched.pt, in the
+       zip format that torch.load can memory-map; the cache is rebuilt if the checkpoint changes (size / mtime);
+    -- the memory-mapped tensors are assigned to the generator (load_state_dict(assign=True)) instead of copied,
+       so the weights are only read from disk when they are first used.
+
+It requires PyTorch >= 2.1 (torch.device context manager, torch.load(mmap=True), load_state_dict(assign=True));
+<is_supported> tells whether the installed version has all of them.
+"""
+import os
+import inspect
+import torch
+
+
+def is_supported():
+    """Return True if the installed PyTorch has the torch.device context manager, torch.load(mmap=True) and load_state_dict(assign=True)"""
+    return (hasattr(torch.device, '__enter__') and 'mmap' in inspect.signature(torch.load).parameters and
+            'assign' in inspect.signature(torch.nn.Module.load_state_dict).parameters)
+
+
+def build_on_meta(build):
+    """Call build() with 'meta' as default device and return the module it creates (without storage)"""
+    with torch.device('meta'):
+        return build()
+
+
+def patch_state_dict(state_dict, net):
+    """Remove the InstanceNorm entries of checkpoints saved before PyTorch 0.4 (as <BaseModel.load_networks> does)
+
+    Parameters:
+        state_dict (dict) -- the loaded checkpoint
+        net (nn.Module)   -- the network the checkpoint is loaded into
+    """
+    if hasattr(state_dict, '_metadata'):
+        del state_dict._metadata
+    for key in list(state_dict.keys()):
+        module_name, _, name = key.rpartition('.')
+        module = net.get_submodule(module_name)
+        if module.__class__.__name__.startswith('InstanceNorm'):
+            if (name in ('running_mean', 'running_var') and getattr(module, name) is None) or name == 'num_batches_tracked':
+                state_dict.pop(key)
+    return state_dict
+
+
+def get_checkpoint_key(checkpoint_path):
+    """Return a key identifying the version of a checkpoint file (its size and modification time)"""
+    stat = os.stat(checkpoint_path)
+    return '%d:%d' % (stat.st_size, stat.st_mtime_ns)
+
+
+def load_state_dict(checkpoint_path, net):
+    """Return the patched, memory-mapped state dict of a checkpoint, building its cached copy if needed
+
+    Parameters:
+        checkpoint_path (str) -- the checkpoint ([epoch]_net_G[model_suffix].pth)
+        net (nn.Module)       -- the network the checkpoint is loaded into (may be on the meta device)
+    """
+    cache_path = checkpoint_path[:-len('.pth')] + '_patched.pt'
+    key = get_checkpoint_key(checkpoint_path)
+    if os.path.exists(cache_path):
+        cached = torch.load(cache_path, map_location='cpu', mmap=True, weights_only=True)
+        if cached.get('checkpoint_key') == key:
+            return cached['state_dict']
+        print('the patched state dict %s is stale; rebuilding it' % cache_path)
+
+    state_dict = patch_state_dict(torch.load(checkpoint_path, map_location='cpu'), net)
+    try:
+        torch.save({'checkpoint_key': key, 'state_dict': state_dict}, cache_path)
+    except OSError as e:  # e.g. read-only checkpoints directory: use the state dict without mapping it
+        print('cannot save the patched state dict %s (%s)' % (cache_path, e))
+        return state_dict
+    print('saved the patched state dict to %s' % cache_path)
+    return torch.load(cache_path, map_location='cpu', mmap=True, weights_only=True)['state_dict']
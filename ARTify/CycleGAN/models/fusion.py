@@ -0,0 +1,121 @@
+"""This module fuses several ResNet generators of the same architecture into one network (e.g. the four styles).
+
+The fused network computes all styles in a single forward pass:
+    -- the first convolution sees the same input for every style; it concatenates the filters of all generators,
+       so the input is not replicated;
+    -- every following convolution (and transposed convolution) becomes a grouped convolution with one group per
+       generator, whose weights are the weights of the generators stacked along the output channels;
+    -- normalization layers are per channel, so the per-group InstanceNorm (or BatchNorm) is a single layer with
+       the concatenated channels (and affine parameters / running statistics) of the generators;
+    -- padding, activation and dropout layers and the skip connections of the ResNet blocks work per channel
+       and are kept as they are.
+Each layer then runs as one large kernel instead of one small kernel per style, which uses the cores and caches
+of the CPU better. The outputs are exactly those of the separate generators (up to float rounding).
+
+Only ResnetGenerator is supported: the skip connections of UnetGenerator concatenate channels across layers.
+"""
+import copy
+import torch
+import torch.nn as nn
+from .networks import ResnetGenerator
+
+
+class FusedGenerator(nn.Module):
+    """Runs several fused generators at once; forward returns a N x G x C x H x W tensor (G = number of generators)"""
+
+    def __init__(self, net, num_generators):
+        """Wrap a fused network
+
+        Parameters:
+            net (nn.Module)       -- the fused network, mapping N x C x H x W inputs to N x (G * C) x H x W outputs
+            num_generators (int)  -- the number of fused generators G
+        """
+        super(FusedGenerator, self).__init__()
+        self.net = net
+        self.num_generators = num_generators
+
+    def forward(self, input):
+        output = self.net(input)
+        return output.view(output.shape[0], self.num_generators, -1, *output.shape[2:])
+
+
+def fuse_conv(convs, shared_input):
+    """Return one (grouped) convolution computing all the given convolutions
+
+    Parameters:
+        convs (list)          -- Conv2d or ConvTranspose2d layers with the same configuration, one per generator
+        shared_input (bool)   -- if the convolutions are applied to the same input (then the layer is not grouped)
+    """
+    first, num = convs[0], len(convs)
+    assert first.groups == 1, 'the generators must not have grouped convolutions'
+    groups = 1 if shared_input else num
+    in_channels = first.in_channels if shared_input else first.in_channels * num
+    kwargs = dict(kernel_size=first.kernel_size, stride=first.stride, padding=first.padding, dilation=first.dilation,
+                  groups=groups, bias=first.bias is not None, padding_mode=first.padding_mode)
+    if isinstance(first, nn.ConvTranspose2d):
+        assert not shared_input, 'the first layer must be a Conv2d'
+        fused = nn.ConvTranspose2d(in_channels, first.out_channels * num, output_padding=first.output_padding, **kwargs)
+        weight = torch.cat([conv.weight for conv in convs], 0)  # in_channels x (out_channels / groups) x kh x kw
+    else:
+        fused = nn.Conv2d(in_channels, first.out_channels * num, **kwargs)
+        weight = torch.cat([conv.weight for conv in convs], 0)  # out_channels x (in_channels / groups) x kh x kw
+    with torch.no_grad():
+        fused.weight.copy_(weight)
+        if first.bias is not None:
+            fused.bias.copy_(torch.cat([conv.bias for conv in convs]))
+    return fused
+
+
+def fuse_norm(norms):
+    """Return one normalization layer with the concatenated channels of the given InstanceNorm / BatchNorm layers"""
+    first = norms[0]
+    fused = first.__class__(first.num_features * len(norms), eps=first.eps, momentum=first.momentum,
+                            affine=first.affine, track_running_stats=first.track_running_stats)
+    with torch.no_grad():
+        for name in ('weight', 'bias', 'running_mean', 'running_var'):
+            if getattr(fused, name) is not None:
+                getattr(fused, name).copy_(torch.cat([getattr(norm, name) for norm in norms]))
+    return fused
+
+
+def fuse_modules(modules, shared_input=True):
+    """Fuse the children of the given modules (one per generator) in place into modules[0], in forward order
+
+    Parameters:
+        modules (list)        -- modules with the same structure, one per generator
+        shared_input (bool)   -- if the input of the first module is the same for every generator
+
+    Returns if the output of the modules is still the same for every generator.
+    """
+    for name, child in list(modules[0].named_children()):
+        children = [getattr(module, name) for module in modules]
+        if isinstance(child, (nn.Conv2d, nn.ConvTranspose2d)):
+            setattr(modules[0], name, fuse_conv(children, shared_input))
+            shared_input = False
+        elif isinstance(child, nn.modules.batchnorm._NormBase):
+            setattr(modules[0], name, fuse_norm(children))
+        else:
+            shared_input = fuse_modules(children, shared_input)
+    return shared_input
+
+
+def can_fuse(nets):
+    """Return True if the given networks are fp32 ResnetGenerators of the same architecture"""
+    nets = [net.module if isinstance(net, nn.DataParallel) else net for net in nets]
+    return (all(isinstance(net, ResnetGenerator) for net in nets) and len(set(str(net) for net in nets)) == 1 and
+            all(param.dtype == torch.float32 for net in nets for param in net.parameters()))
+
+
+def fuse_generators(nets):
+    """Return a FusedGenerator computing all the given ResNet generators in one forward pass
+
+    Parameters:
+        nets (list) -- ResnetGenerator networks with the same architecture (e.g. loaded from different checkpoints)
+
+    The generators are not modified.
+    """
+    assert can_fuse(nets), 'only fp32 ResnetGenerators of the same architecture can be fused'
+    nets = [net.module if isinstance(net, nn.DataParallel) else net for net in nets]
+    fused = copy.deepcopy(nets[0])
+    fuse_modules([fused] + nets[1:])
+    return FusedGenerator(fused, len(nets)).eval()
@@ -0,0 +1,67 @@
+"""This module caches generators as frozen TorchScript artifacts next to their checkpoints.
+
+An artifact is the traced generator frozen with torch.jit.freeze (weights become constants). It is saved as
+<checkpoints_dir>/<name>/[epoch]_net_G[model_suffix]_jit.pt together with a cache key made of the checkpoint hash,
+the torch version, the input shape and the conversions applied to the generator (quantization, memory format).
+If the key of a saved artifact does not match, the artifact is stale and rebuilt from the checkpoint.
+torch.jit.optimize_for_inference is applied after loading, as optimized modules cannot be serialized.
+"""
+import os
+import json
+import hashlib
+import torch
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def get_cache_key(checkpoint_path, input_shape, **conversions):
+    """Return the cache key of an artifact
+
+    Parameters:
+        checkpoint_path (str)   -- the checkpoint the generator weights are loaded from
+        input_shape (int tuple) -- the shape of the input images (C, H, W); the batch dimension is not fixed
+        conversions (dict)      -- the conversions applied to the generator, e.g. quantize='static'
+    """
+    key = {'checkpoint': file_hash(checkpoint_path), 'torch': torch.__version__, 'input_shape': list(input_shape)}
+    key.update(conversions)
+    return json.dumps(key, sort_keys=True)
+
+
+def load_artifact(path, key):
+    """Return the optimized TorchScript generator saved at path, or None if it is missing or stale"""
+    if not os.path.exists(path):
+        return None
+    extra_files = {'cache_key': ''}
+    try:
+        net = torch.jit.load(path, map_location='cpu', _extra_files=extra_files)
+    except RuntimeError as e:  # e.g. saved by an incompatible torch version
+        print('cannot load the TorchScript artifact %s (%s); rebuilding it' % (path, e))
+        return None
+    if extra_files['cache_key'].decode() != key:
+        print('the TorchScript artifact %s is stale; rebuilding it' % path)
+        return None
+    return torch.jit.optimize_for_inference(net)
+
+
+def save_artifact(net, path, key, example_input):
+    """Trace and freeze the generator, save it as an artifact and return its optimized version
+
+    Parameters:
+        net (nn.Module)         -- the generator with its weights loaded
+        path (str)              -- where to save the artifact
+        key (str)               -- the cache key returned by <get_cache_key>
+        example_input (tensor)  -- an input of the expected shape and memory format, used for tracing
+    """
+    with torch.no_grad():
+        traced = torch.jit.trace(net.eval(), example_input)
+    frozen = torch.jit.freeze(traced.eval())
+    torch.jit.save(frozen, path, _extra_files={'cache_key': key})
+    print('saved the TorchScript artifact to %s' % path)
+    return torch.jit.optimize_for_inference(frozen)
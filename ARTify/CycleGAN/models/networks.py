@@ -15,6 +15,39 @@ class Identity(nn.Module):
         return x
 
 
+class ChannelsLastInstanceNorm2d(nn.Module):
+    """Instance normalization without affine parameters and running statistics that keeps the memory format of its input.
+
+    nn.InstanceNorm2d returns NCHW-contiguous outputs, which forces a layout reorder after every normalization
+    of a channels-last network. This layer computes the same statistics with reductions over H and W.
+    """
+
+    def __init__(self, eps=1e-5):
+        super(ChannelsLastInstanceNorm2d, self).__init__()
+        self.eps = eps
+
+    def forward(self, x):
+        var, mean = torch.var_mean(x, dim=(2, 3), keepdim=True, unbiased=False)
+        return (x - mean) * torch.rsqrt(var + self.eps)
+
+
+def to_channels_last(net):
+    """Convert a network to run in channels-last (NHWC) memory format end to end
+
+    Parameters:
+        net (network) -- the network to convert; InstanceNorm2d layers without affine parameters and
+                         running statistics are replaced by ChannelsLastInstanceNorm2d
+
+    Return the converted network. Its inputs must be converted with x.to(memory_format=torch.channels_last).
+    """
+    for name, module in net.named_children():
+        if isinstance(module, nn.InstanceNorm2d) and not module.affine and not module.track_running_stats:
+            setattr(net, name, ChannelsLastInstanceNorm2d(module.eps))
+        else:
+            to_channels_last(module)
+    return net.to(memory_format=torch.channels_last)
+
+
 def get_norm_layer(norm_type='instance'):
     """Return a normalization layer
 
@@ -103,7 +136,8 @@ def init_net(net, init_type='normal', init_gain=0.02, gpu_ids=[]):
     """Initialize a network: 1. register CPU/GPU device (with multi-GPU support); 2. initialize the network weights
     Parameters:
         net (network)      -- the network to be initialized
-        init_type (str)    -- the name of an initialization method: normal | xavier | kaiming | orthogonal
+        init_type (str)    -- the name of an initialization method: normal | xavier | kaiming | orthogonal;
+                              None skips the initialization (the weights are loaded afterwards)
         gain (float)       -- scaling factor for normal, xavier and orthogonal.
         gpu_ids (int list) -- which GPUs the network runs on: e.g., 0,1,2
 
@@ -113,7 +147,8 @@ def init_net(net, init_type='normal', init_gain=0.02, gpu_ids=[]):
         assert(torch.cuda.is_available())
         net.to(gpu_ids[0])
         net = torch.nn.DataParallel(net, gpu_ids)  # multi-GPUs
-    init_weights(net, init_type, init_gain=init_gain)
+    if init_type is not None:
+        init_weights(net, init_type, init_gain=init_gain)
     return net
 
 
@@ -127,7 +162,7 @@ def define_G(input_nc, output_nc, ngf, netG, norm='batch', use_dropout=False, in
         netG (str) -- the architecture's name: resnet_9blocks | resnet_6blocks | unet_256 | unet_128
         norm (str) -- the name of normalization layers used in the network: batch | instance | none
         use_dropout (bool) -- if use dropout layers.
-        init_type (str)    -- the name of our initialization method.
+        init_type (str)    -- the name of our initialization method; None skips the initialization.
         init_gain (float)  -- scaling factor for normal, xavier and orthogonal.
         gpu_ids (int list) -- which GPUs the network runs on: e.g., 0,1,2
 
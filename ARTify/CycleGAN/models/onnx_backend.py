@@ -0,0 +1,88 @@
+"""This module runs generators with ONNX Runtime on CPU (option '--backend onnxruntime').
+
+The generator is exported to ONNX with dynamic batch and spatial axes and saved next to its checkpoint as
+<checkpoints_dir>/<name>/[epoch]_net_G[model_suffix].onnx, with the cache key of models/jit_cache.py stored in the
+model metadata. A stale or missing export is rebuilt from the checkpoint.
+The exported graph runs in an onnxruntime InferenceSession (CPU execution provider, all graph optimizations).
+<OnnxGenerator> takes and returns torch tensors, so it is a drop-in replacement for netG.
+
+This backend requires the optional packages 'onnx' and 'onnxruntime' (pip install onnx onnxruntime).
+"""
+import os
+import torch
+
+
+class OnnxGenerator():
+    """Callable wrapper of an onnxruntime InferenceSession with the interface of a generator"""
+
+    def __init__(self, path):
+        """Create an inference session for the ONNX model at path
+
+        A session keeps the intra-op thread count it was created with, so there is one session per thread count:
+        every call runs in a session using as many threads as torch currently does in the calling thread
+        (e.g. a style engine worker pinned to its cores), whichever thread loaded the model.
+        """
+        self.path = path
+        self.sessions = {}
+        session = self.get_session()
+        self.input_name = session.get_inputs()[0].name
+        self.cache_key = session.get_modelmeta().custom_metadata_map.get('cache_key')
+
+    def get_session(self):
+        """Return the session using the intra-op thread count of the calling thread, created on first use"""
+        import onnxruntime as ort
+        num_threads = torch.get_num_threads()
+        if num_threads not in self.sessions:
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.intra_op_num_threads = num_threads
+            # concurrent callers with the same thread count may both create it; the last one is kept
+            self.sessions[num_threads] = ort.InferenceSession(self.path, options, providers=['CPUExecutionProvider'])
+        return self.sessions[num_threads]
+
+    def __call__(self, input):
+        """Run the generator on an NCHW tensor and return the output as a tensor"""
+        output = self.get_session().run(None, {self.input_name: input.detach().cpu().float().contiguous().numpy()})[0]
+        return torch.from_numpy(output)
+
+    def eval(self):
+        """The exported graph is always in inference mode"""
+        return self
+
+
+def load_session(path, key):
+    """Return an <OnnxGenerator> for the ONNX model saved at path, or None if it is missing or stale"""
+    if not os.path.exists(path):
+        return None
+    net = OnnxGenerator(path)
+    if net.cache_key != key:
+        print('the ONNX model %s is stale; exporting it again' % path)
+        return None
+    return net
+
+
+def export_session(net, path, key, example_input):
+    """Export the generator to ONNX, save it at path and return an <OnnxGenerator> running it
+
+    Parameters:
+        net (nn.Module)         -- the generator with its weights loaded
+        path (str)              -- where to save the ONNX model
+        key (str)               -- the cache key returned by <jit_cache.get_cache_key>
+        example_input (tensor)  -- an input of the expected shape; batch, height and width stay dynamic
+    """
+    import onnx
+    dynamic_axes = {'input': {0: 'batch', 2: 'height', 3: 'width'}, 'output': {0: 'batch', 2: 'height', 3: 'width'}}
+    export_args = dict(input_names=['input'], output_names=['output'], dynamic_axes=dynamic_axes, opset_version=17)
+    with torch.no_grad():
+        try:
+            torch.onnx.export(net.eval(), (example_input,), path, dynamo=False, **export_args)
+        except TypeError:  # PyTorch < 2.5 has only the TorchScript-based exporter
+            torch.onnx.export(net.eval(), (example_input,), path, **export_args)
+
+    # store the cache key in the model metadata
+    model = onnx.load(path)
+    entry = model.metadata_props.add()
+    entry.key, entry.value = 'cache_key', key
+    onnx.save(model, path)
+    print('saved the ONNX model to %s' % path)
+    return OnnxGenerator(path)
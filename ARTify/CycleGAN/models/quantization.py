@@ -0,0 +1,85 @@
+"""This module implements INT8 post-training quantization of generators for CPU inference.
+
+Static quantization traces the generator with torch.fx, calibrates the activation ranges on a folder of images
+and converts every Conv2d / ConvTranspose2d / InstanceNorm2d / ReLU / skip connection to its quantized kernel.
+If static quantization is not possible (e.g. the installed PyTorch has no FX quantization or no quantized engine),
+the generator keeps running in fp32 and a warning is printed. (Dynamic quantization is not offered: it only covers
+Linear and recurrent layers, so it would leave a convolutional generator in fp32 as well.)
+
+An accuracy guard compares the quantized outputs with the fp32 outputs on the calibration images (PSNR / SSIM)
+and keeps the fp32 generator if they differ too much.
+"""
+import copy
+import torch
+from PIL import Image
+from data.base_dataset import get_transform
+from data.image_folder import make_dataset
+from util import util
+
+
+def load_calibration_images(opt):
+    """Load and preprocess the calibration images as one NCHW tensor
+
+    Parameters:
+        opt (Option class) -- opt.calibration_dir is the image folder; at most opt.num_calibration images are used
+    """
+    paths = sorted(make_dataset(opt.calibration_dir, opt.num_calibration))
+    if len(paths) == 0:
+        raise RuntimeError('Found 0 calibration images in: %s' % opt.calibration_dir)
+    transform = get_transform(opt, grayscale=(opt.input_nc == 1))
+    return torch.stack([transform(Image.open(path).convert('RGB')) for path in paths])
+
+
+def run_batches(net, images, batch_size=4):
+    """Run the network over the images in small batches and return the concatenated outputs"""
+    with torch.no_grad():
+        return torch.cat([net(images[i:i + batch_size]) for i in range(0, len(images), batch_size)])
+
+
+def quantize_static(net, calibration_images):
+    """Return a statically quantized copy of the network, calibrated on the given images
+
+    Parameters:
+        net (nn.Module)             -- the fp32 network (in eval mode)
+        calibration_images (tensor) -- NCHW images used to observe the activation ranges
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    engine = 'x86' if 'x86' in torch.backends.quantized.supported_engines else 'fbgemm'
+    torch.backends.quantized.engine = engine
+    qconfig_mapping = get_default_qconfig_mapping(engine)
+    prepared = prepare_fx(copy.deepcopy(net), qconfig_mapping, (calibration_images[:1],))
+    run_batches(prepared, calibration_images)  # calibration: observers record the activation ranges
+    return convert_fx(prepared)
+
+
+def quantize_generator(net, opt):
+    """Quantize a generator for CPU inference and check its accuracy against the fp32 generator
+
+    Parameters:
+        net (nn.Module)    -- the fp32 generator with its weights loaded
+        opt (Option class) -- opt.quantize is the quantization mode: static;
+                              opt.quantize_min_psnr and opt.quantize_min_ssim are the accuracy thresholds
+
+    Returns the quantized generator, or the fp32 generator if quantization is not possible or not accurate enough.
+    """
+    net.eval()
+    calibration_images = load_calibration_images(opt)
+    reference = run_batches(net, calibration_images)
+
+    try:
+        quantized = quantize_static(net, calibration_images)
+    except (ImportError, AttributeError, RuntimeError, NotImplementedError) as e:
+        print('WARNING: static quantization is not possible (%s); the generator is NOT quantized and runs in fp32' % e)
+        return net
+
+    # accuracy guard: compare with the fp32 outputs on the calibration images
+    output = run_batches(quantized, calibration_images)
+    psnr, ssim = util.psnr(reference, output), util.ssim(reference, output)
+    print('quantized generator: PSNR = %.2f dB, SSIM = %.4f (against fp32)' % (psnr, ssim))
+    if psnr < opt.quantize_min_psnr or ssim < opt.quantize_min_ssim:
+        print('quantized generator is below the accuracy thresholds (PSNR %.2f dB, SSIM %.4f); using fp32' %
+              (opt.quantize_min_psnr, opt.quantize_min_ssim))
+        return net
+    return quantized
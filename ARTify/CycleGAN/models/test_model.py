@@ -1,5 +1,9 @@
+import os
+import torch
+import torch.nn as nn
 from .base_model import BaseModel
-from . import networks
+from . import networks, quantization, jit_cache, onnx_backend, bf16, tiling, fast_load, profiling
+from util import util
 
 
 class TestModel(BaseModel):
@@ -25,6 +29,26 @@ class TestModel(BaseModel):
         assert not is_train, 'TestModel cannot be used during training time'
         parser.set_defaults(dataset_mode='single')
         parser.add_argument('--model_suffix', type=str, default='', help='In checkpoints_dir, [epoch]_net_G[model_suffix].pth will be loaded as the generator.')
+        # INT8 post-training quantization for CPU inference (see models/quantization.py)
+        parser.add_argument('--quantize', type=str, default='none', choices=['none', 'static'], help='quantize the generator for CPU inference [none | static]')
+        parser.add_argument('--calibration_dir', type=str, default='', help='images used to calibrate static quantization and to check its accuracy')
+        parser.add_argument('--num_calibration', type=int, default=16, help='maximum number of calibration images')
+        parser.add_argument('--quantize_min_psnr', type=float, default=30.0, help='keep the fp32 generator if the quantized outputs are below this PSNR (dB)')
+        parser.add_argument('--quantize_min_ssim', type=float, default=0.9, help='keep the fp32 generator if the quantized outputs are below this SSIM')
+        parser.add_argument('--channels_last', action='store_true', help='run the fp32 generator in channels-last (NHWC) memory format')
+        parser.add_argument('--jit', action='store_true', help='run a frozen TorchScript generator, cached in checkpoints_dir/name and rebuilt when stale')
+        # bfloat16 autocast on CPUs with native support (see models/bf16.py)
+        parser.add_argument('--bf16', action='store_true', help='run the fp32 generator under bfloat16 autocast if the CPU supports it natively (not with --quantize or --jit)')
+        parser.add_argument('--bf16_min_psnr', type=float, default=35.0, help='keep fp32 if the bfloat16 outputs are below this PSNR (dB)')
+        parser.add_argument('--bf16_min_ssim', type=float, default=0.95, help='keep fp32 if the bfloat16 outputs are below this SSIM')
+        # tiled inference of full-resolution images (see models/tiling.py); use with --preprocess none
+        parser.add_argument('--tile_size', type=int, default=0, help='run the generator over overlapping tiles of this size (a multiple of 4); 0 runs whole images')
+        parser.add_argument('--tile_overlap', type=int, default=32, help='overlap of neighbouring tiles in pixels; the seams are feathered across it')
+        parser.add_argument('--tile_batch_size', type=int, default=0, help='tiles per forward pass; 0 picks it from the available memory')
+        # distilled student generator for low-end CPUs (see scripts/distill_student.py); it replaces --netG, --ngf and --model_suffix
+        parser.add_argument('--fast', action='store_true', help='load the smaller student generator [epoch]_net_G[model_suffix]_student.pth instead of the pretrained one')
+        parser.add_argument('--student_netG', type=str, default='resnet_6blocks', help='architecture of the student generator')
+        parser.add_argument('--student_ngf', type=int, default=32, help='# of gen filters in the last conv layer of the student generator')
 
         return parser
 
@@ -39,16 +63,111 @@ class TestModel(BaseModel):
         # specify the training losses you want to print out. The training/test scripts  will call <BaseModel.get_current_losses>
         self.loss_names = []
         # specify the images you want to save/display. The training/test scripts  will call <BaseModel.get_current_visuals>
-        self.visual_names = ['real', 'fake']
+        self.visual_names = ['fake'] if getattr(opt, 'headless', False) else ['real', 'fake']  # headless callers only need the outputs
         # specify the models you want to save to the disk. The training/test scripts will call <BaseModel.save_networks> and <BaseModel.load_networks>
         self.model_names = ['G' + opt.model_suffix]  # only generator is needed.
-        self.netG = networks.define_G(opt.input_nc, opt.output_nc, opt.ngf, opt.netG,
-                                      opt.norm, not opt.no_dropout, opt.init_type, opt.init_gain, self.gpu_ids)
+        # channels-last applies to the fp32 torch generator only; quantized kernels and onnxruntime choose their own layout
+        self.channels_last = opt.channels_last and opt.quantize == 'none' and opt.backend == 'torch'
+        self.bf16 = False  # enabled in <setup> once the CPU and the accuracy of the generator are checked
+        self.quantized = False  # set in <setup> if quantization succeeds and passes its accuracy guard
+        if opt.tile_size > 0:
+            assert opt.tile_size % 4 == 0, '--tile_size must be a multiple of 4'
+            assert 0 <= opt.tile_overlap < opt.tile_size, '--tile_overlap must be smaller than --tile_size'
+        self.memory_fraction = 0.25  # fraction of the available memory a batch of tiles may use
+        self.profiler = None  # attached in <setup> with '--profile'
+        self.netG = None
+        if opt.jit or opt.backend == 'onnxruntime':  # a valid cached artifact replaces the construction and loading of the generator
+            assert not self.gpu_ids, 'TorchScript and ONNX generators only run on CPU (--gpu_ids -1)'
+            load_suffix = 'iter_%d' % opt.load_iter if opt.load_iter > 0 else opt.epoch
+            checkpoint_path = os.path.join(self.save_dir, '%s_net_G%s.pth' % (load_suffix, opt.model_suffix))
+            self.artifact_key = jit_cache.get_cache_key(checkpoint_path, (opt.input_nc, opt.crop_size, opt.crop_size), backend=opt.backend,
+                                                        quantize=opt.quantize, channels_last=self.channels_last)
+            if opt.backend == 'onnxruntime':
+                self.artifact_path = os.path.join(self.save_dir, '%s_net_G%s.onnx' % (load_suffix, opt.model_suffix))
+                self.netG = onnx_backend.load_session(self.artifact_path, self.artifact_key)
+            else:
+                self.artifact_path = os.path.join(self.save_dir, '%s_net_G%s_jit.pt' % (load_suffix, opt.model_suffix))
+                self.netG = jit_cache.load_artifact(self.artifact_path, self.artifact_key)
+        self.artifact_loaded = self.netG is not None
+        # on CPU, the generator is built without storage and takes the tensors of the checkpoint in <load_networks>
+        self.fast_load = not self.artifact_loaded and not self.gpu_ids and fast_load.is_supported()
+        if not self.artifact_loaded:
+            def build():  # no weight initialization, the checkpoint is always loaded
+                return networks.define_G(opt.input_nc, opt.output_nc, opt.ngf, opt.netG,
+                                         opt.norm, not opt.no_dropout, None, opt.init_gain, self.gpu_ids)
+            self.netG = fast_load.build_on_meta(build) if self.fast_load else build()
 
         # assigns the model to self.netG_[suffix] so that it can be loaded
         # please see <BaseModel.load_networks>
         setattr(self, 'netG' + opt.model_suffix, self.netG)  # store netG in self.
 
+    def setup(self, opt):
+        """Load and print networks; quantize / convert / export the generator if requested
+
+        Parameters:
+            opt (Option class) -- stores all the experiment flags; needs to be a subclass of BaseOptions
+        """
+        if self.artifact_loaded:  # the cached artifact already holds the loaded and converted weights
+            print('loaded the cached generator from %s' % self.artifact_path)
+            if getattr(opt, 'profile', 'none') != 'none':
+                print('TorchScript and ONNX generators cannot be profiled per layer; run without --jit and --backend onnxruntime')
+            return
+        BaseModel.setup(self, opt)
+        example_input = torch.zeros(1, opt.input_nc, opt.crop_size, opt.crop_size)
+        if opt.backend == 'onnxruntime':  # the fp32 generator is exported; quantization and channels-last do not apply
+            self.netG = onnx_backend.export_session(self.netG, self.artifact_path, self.artifact_key, example_input)
+        else:
+            if opt.quantize != 'none':
+                assert not self.gpu_ids, 'quantized generators only run on CPU (--gpu_ids -1)'
+                quantized = quantization.quantize_generator(self.netG, opt)
+                self.quantized = quantized is not self.netG  # the fp32 generator is returned if quantization is not used
+                self.netG = quantized
+            elif self.channels_last:
+                self.netG = networks.to_channels_last(self.netG)
+            if opt.bf16 and opt.quantize == 'none' and not opt.jit and not self.gpu_ids:
+                if bf16.cpu_supports_bf16():
+                    self.bf16 = bf16.validate_bf16(self.netG, opt)
+                else:
+                    print('the CPU has no native bfloat16 support (AVX512-BF16 / AMX); using fp32')
+            if opt.jit:
+                self.set_input({'A': example_input, 'A_paths': []})  # same device and memory format as at test time
+                self.netG = jit_cache.save_artifact(self.netG, self.artifact_path, self.artifact_key, self.real)
+        if getattr(opt, 'profile', 'none') != 'none':
+            if isinstance(self.netG, nn.Module) and not isinstance(self.netG, torch.jit.ScriptModule):
+                self.profiler = profiling.LayerProfiler(self.netG)
+            else:
+                print('TorchScript and ONNX generators cannot be profiled per layer; run without --jit and --backend onnxruntime')
+        setattr(self, 'netG' + opt.model_suffix, self.netG)
+
+    def save_profile(self, save_dir):
+        """Save the per-layer profile of the generator ('--profile') as a Chrome trace and / or a summary table
+
+        Parameters:
+            save_dir (str) -- the directory of profile_trace.json and profile_summary.txt
+        """
+        if self.profiler is None:
+            return
+        os.makedirs(save_dir, exist_ok=True)
+        if self.opt.profile in ('trace', 'all'):
+            self.profiler.export_chrome_trace(os.path.join(save_dir, 'profile_trace.json'))
+            print('saved the Chrome trace of the generator to %s' % os.path.join(save_dir, 'profile_trace.json'))
+        if self.opt.profile in ('table', 'all'):
+            self.profiler.export_summary(os.path.join(save_dir, 'profile_summary.txt'))
+            print(self.profiler.summary())
+
+    def load_networks(self, epoch):
+        """Load the generator from the disk; a generator built on the meta device takes the memory-mapped tensors of
+        a cached, patched copy of the checkpoint (see models/fast_load.py)
+
+        Parameters:
+            epoch (int) -- current epoch; used in the file name '%s_net_%s.pth' % (epoch, name)
+        """
+        if not self.fast_load:
+            return BaseModel.load_networks(self, epoch)
+        load_path = os.path.join(self.save_dir, '%s_net_G%s.pth' % (epoch, self.opt.model_suffix))
+        print('loading the model from %s' % load_path)
+        self.netG.load_state_dict(fast_load.load_state_dict(load_path, self.netG), assign=True)
+
     def set_input(self, input):
         """Unpack input data from the dataloader and perform necessary pre-processing steps.
 
@@ -57,12 +176,30 @@ class TestModel(BaseModel):
 
         We need to use 'single_dataset' dataset mode. It only load images from one domain.
         """
-        self.real = input['A'].to(self.device)
+        if self.channels_last:
+            self.real = input['A'].to(self.device, memory_format=torch.channels_last)  # stays NHWC up to tensor2im
+        else:
+            self.real = input['A'].to(self.device)
         self.image_paths = input['A_paths']
 
     def forward(self):
         """Run forward pass."""
-        self.fake = self.netG(self.real)  # G(real)
+        with bf16.autocast(self.bf16):
+            if self.opt.tile_size > 0:
+                height, width = self.real.shape[2:]
+                num_tiles = len(self.real) * tiling.count_tiles(height, width, self.opt.tile_size, self.opt.tile_overlap)
+                batch_size = util.get_batch_size(self.opt, num_tiles, memory_fraction=self.memory_fraction,
+                                                image_size=self.opt.tile_size, batch_size=self.opt.tile_batch_size)
+                memory_format = torch.channels_last if self.channels_last else torch.contiguous_format
+                self.fake = tiling.tiled_forward(self.netG, self.real, self.opt.tile_size, self.opt.tile_overlap, batch_size, memory_format)
+            else:
+                self.fake = self.netG(self.real).float()  # G(real)
+
+    def test(self):
+        """Forward function used in test time; runs under inference mode, which skips all autograd bookkeeping"""
+        with torch.inference_mode():
+            self.forward()
+            self.compute_visuals()
 
     def optimize_parameters(self):
         """No optimization for test model."""
@@ -0,0 +1,78 @@
+"""This module implements tiled inference of fully convolutional generators (option '--tile_size').
+
+A large image is split into overlapping square tiles, the tiles of all images of the batch are run through the
+generator in small batches, and the outputs are blended back with a feathering window: inside the overlap, the
+weight of a tile ramps down linearly towards its border, so the seams fade from one tile into the next.
+The activations only ever hold one batch of tiles, so the peak memory does not grow with the image size
+(only the output canvas does).
+
+The image is padded (replicating its border) to at least one tile and to a multiple of 4, as required by the
+two down- and upsampling layers of the ResNet generator, and the output is cropped back to the input size.
+Note that instance normalization is computed per tile; a larger overlap hides the resulting tone differences.
+"""
+import torch
+import torch.nn.functional as F
+
+
+def get_padded_size(length, tile_size):
+    """Return the padded length of an image side: at least one tile and a multiple of 4"""
+    return max(tile_size, (length + 3) // 4 * 4)
+
+
+def get_tile_starts(length, tile_size, overlap):
+    """Return the start offsets of the tiles along an image side of the given (padded) length"""
+    stride = tile_size - overlap
+    return list(range(0, length - tile_size, stride)) + [length - tile_size]
+
+
+def count_tiles(height, width, tile_size, overlap):
+    """Return the number of tiles of an image"""
+    padded_h, padded_w = get_padded_size(height, tile_size), get_padded_size(width, tile_size)
+    return len(get_tile_starts(padded_h, tile_size, overlap)) * len(get_tile_starts(padded_w, tile_size, overlap))
+
+
+def get_feather_window(tile_size, overlap):
+    """Return the (tile_size x tile_size) blending weights of a tile; linear ramps of width overlap at the borders"""
+    ramp = torch.ones(tile_size)
+    if overlap > 0:
+        edge = (torch.arange(overlap, dtype=torch.float32) + 0.5) / overlap
+        ramp[:overlap] = edge
+        ramp[-overlap:] = edge.flip(0)
+    return ramp[:, None] * ramp[None, :]
+
+
+def tiled_forward(net, input, tile_size, overlap, batch_size, memory_format=torch.contiguous_format):
+    """Run the generator over overlapping tiles of the input and blend the outputs
+
+    Parameters:
+        net (callable)          -- the generator; maps an NCHW batch of tiles to an NCHW batch of outputs
+        input (tensor)          -- the NCHW input images
+        tile_size (int)         -- the side of the square tiles; a multiple of 4
+        overlap (int)           -- the overlap of neighbouring tiles, in pixels; smaller than tile_size
+        batch_size (int)        -- the number of tiles per forward pass
+        memory_format           -- the memory format of the batches of tiles (e.g. torch.channels_last)
+
+    Returns the float32 NCHW output images, of the same size as the input.
+    """
+    n, _, h, w = input.shape
+    padded_h, padded_w = get_padded_size(h, tile_size), get_padded_size(w, tile_size)
+    if (padded_h, padded_w) != (h, w):
+        input = F.pad(input, (0, padded_w - w, 0, padded_h - h), mode='replicate')
+    tiles = [(i, y, x) for i in range(n)
+             for y in get_tile_starts(padded_h, tile_size, overlap)
+             for x in get_tile_starts(padded_w, tile_size, overlap)]
+    window = get_feather_window(tile_size, overlap).to(input.device)
+
+    output, weight = None, torch.zeros(padded_h, padded_w, device=input.device)
+    for start in range(0, len(tiles), batch_size):
+        batch = tiles[start:start + batch_size]
+        tile_input = torch.stack([input[i, :, y:y + tile_size, x:x + tile_size] for i, y, x in batch])
+        tile_output = net(tile_input.contiguous(memory_format=memory_format)).float()
+        if output is None:  # the generator may change the number of channels
+            output = torch.zeros(n, tile_output.shape[1], padded_h, padded_w, device=input.device)
+        for (i, y, x), tile in zip(batch, tile_output):
+            output[i, :, y:y + tile_size, x:x + tile_size] += tile * window
+    for y in get_tile_starts(padded_h, tile_size, overlap):
+        for x in get_tile_starts(padded_w, tile_size, overlap):
+            weight[y:y + tile_size, x:x + tile_size] += window
+    return (output / weight)[:, :, :h, :w]
@@ -23,6 +23,7 @@ class BaseOptions():
         parser.add_argument('--dataroot', required=True, help='path to images (should have subfolders trainA, trainB, valA, valB, etc)')
         parser.add_argument('--name', type=str, default='experiment_name', help='name of the experiment. It decides where to store samples and models')
         parser.add_argument('--gpu_ids', type=str, default='0', help='gpu ids: e.g. 0  0,1,2, 0,2. use -1 for CPU')
+        parser.add_argument('--backend', type=str, default='torch', choices=['torch', 'onnxruntime'], help='execution backend of the test model [torch | onnxruntime]. onnxruntime runs on CPU and requires the onnx and onnxruntime packages')
         parser.add_argument('--checkpoints_dir', type=str, default='./checkpoints', help='models are saved here')
         # model parameters
         parser.add_argument('--model', type=str, default='cycle_gan', help='chooses which model to use. [cycle_gan | pix2pix | test | colorization]')
@@ -60,24 +61,27 @@ class BaseOptions():
         self.initialized = True
         return parser
 
-    def gather_options(self):
+    def gather_options(self, args=None):
         """Initialize our parser with basic options(only once).
         Add additional model-specific and dataset-specific options.
         These options are defined in the <modify_commandline_options> function
         in model and dataset classes.
+
+        Parameters:
+            args (str list) -- the arguments to parse; if None, sys.argv is used
         """
         if not self.initialized:  # check if it has been initialized
             parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
             parser = self.initialize(parser)
 
         # get the basic options
-        opt, _ = parser.parse_known_args()
+        opt, _ = parser.parse_known_args(args)
 
         # modify model-related parser options
         model_name = opt.model
         model_option_setter = models.get_option_setter(model_name)
         parser = model_option_setter(parser, self.isTrain)
-        opt, _ = parser.parse_known_args()  # parse again with new defaults
+        opt, _ = parser.parse_known_args(args)  # parse again with new defaults
 
         # modify dataset-related parser options
         dataset_name = opt.dataset_mode
@@ -86,7 +90,7 @@ class BaseOptions():
 
         # save and return the parser
         self.parser = parser
-        return parser.parse_args()
+        return parser.parse_args(args)
 
     def print_options(self, opt):
         """Print and save options
@@ -113,9 +117,13 @@ class BaseOptions():
             opt_file.write(message)
             opt_file.write('\n')
 
-    def parse(self):
-        """Parse our options, create checkpoints directory suffix, and set up gpu device."""
-        opt = self.gather_options()
+    def parse(self, args=None):
+        """Parse our options, create checkpoints directory suffix, and set up gpu device.
+
+        Parameters:
+            args (str list) -- the arguments to parse; if None, sys.argv is used (command line)
+        """
+        opt = self.gather_options(args)
         opt.isTrain = self.isTrain   # train or test
 
         # process opt.suffix
@@ -123,6 +131,10 @@ class BaseOptions():
             suffix = ('_' + opt.suffix.format(**vars(opt))) if opt.suffix != '' else ''
             opt.name = opt.name + suffix
 
+        # the fast mode of the test model runs the distilled student generator instead of the pretrained one
+        if getattr(opt, 'fast', False):
+            opt.netG, opt.ngf, opt.model_suffix = opt.student_netG, opt.student_ngf, opt.model_suffix + '_student'
+
         self.print_options(opt)
 
         # set gpu ids
@@ -15,8 +15,17 @@ class TestOptions(BaseOptions):
         # Dropout and Batchnorm has different behavioir during training and test.
         parser.add_argument('--eval', action='store_true', help='use eval mode during test time.')
         parser.add_argument('--num_test', type=int, default=50, help='how many test images to run')
+        # headless mode: the fake images stay in memory (see run_inference in test.py); no HTML report and no real images
+        parser.add_argument('--headless', action='store_true', help='skip the HTML report and the real images; test.py only saves the fake images to results_dir/name')
+        # the output images are PNG-encoded in a thread pool while the next batch runs (see util/encoding.py)
+        parser.add_argument('--num_encode_threads', type=int, default=4, help='threads encoding the output images; 0 encodes them in the inference loop')
+        parser.add_argument('--png_compress_level', type=int, default=6, help='zlib level of the output PNG images, from 0 (fastest, largest) to 9 (slowest, smallest)')
+        # per-layer profiling of the generator (see models/profiling.py); the results are saved next to the HTML report
+        parser.add_argument('--profile', type=str, default='none', choices=['none', 'trace', 'table', 'all'], help='profile every layer of the generator and save a Chrome trace, a summary table or both [none | trace | table | all]')
         # rewrite devalue values
         parser.set_defaults(model='test')
+        # batch_size <= 0 picks the inference batch size from the available memory (see util.get_batch_size)
+        parser.set_defaults(batch_size=0)
         # To avoid cropping, the load_size should be the same as crop_size
         parser.set_defaults(load_size=parser.get_default('crop_size'))
         self.isTrain = False
@@ -0,0 +1,61 @@
+"""Compare the CPU inference speed of a generator in the default (NCHW) and channels-last (NHWC) memory formats.
+
+Example:
+    python scripts/benchmark_channels_last.py --batch_size 4 --num_threads 8
+    python scripts/benchmark_channels_last.py --checkpoint ./checkpoints/style_monet_pretrained/latest_net_G.pth
+
+Without --checkpoint, the generator keeps its random initialization (the speed does not depend on the weights).
+"""
+import os
+import sys
+import time
+import copy
+import argparse
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # run from the CycleGAN folder or anywhere else
+from models import networks, fast_load
+
+
+def benchmark(net, x, num_iters, warmup):
+    """Return the median time (in seconds) of a forward pass and the last output"""
+    times = []
+    with torch.no_grad():
+        for i in range(warmup + num_iters):
+            start = time.perf_counter()
+            output = net(x)
+            if i >= warmup:
+                times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2], output
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--netG', type=str, default='resnet_9blocks', help='generator architecture [resnet_9blocks | resnet_6blocks | unet_256 | unet_128]')
+    parser.add_argument('--ngf', type=int, default=64, help='# of gen filters in the last conv layer')
+    parser.add_argument('--checkpoint', type=str, default='', help='optional generator weights (*_net_G.pth)')
+    parser.add_argument('--batch_size', type=int, default=1, help='images per forward pass')
+    parser.add_argument('--load_size', type=int, default=256, help='input resolution')
+    parser.add_argument('--num_threads', type=int, default=0, help='intra-op threads; 0 keeps the torch default')
+    parser.add_argument('--num_iters', type=int, default=10, help='timed forward passes per mode')
+    parser.add_argument('--warmup', type=int, default=2, help='untimed forward passes per mode')
+    opt = parser.parse_args()
+
+    if opt.num_threads > 0:
+        torch.set_num_threads(opt.num_threads)
+    net = networks.define_G(3, 3, opt.ngf, opt.netG, 'instance', False, 'normal', 0.02, [])
+    if opt.checkpoint:
+        # pretrained checkpoints saved before PyTorch 0.4 hold InstanceNorm entries the current layers do not have
+        net.load_state_dict(fast_load.patch_state_dict(torch.load(opt.checkpoint, map_location='cpu'), net))
+    net.eval()
+    net_cl = networks.to_channels_last(copy.deepcopy(net))
+
+    x = torch.rand(opt.batch_size, 3, opt.load_size, opt.load_size) * 2 - 1
+    time_nchw, out_nchw = benchmark(net, x, opt.num_iters, opt.warmup)
+    time_nhwc, out_nhwc = benchmark(net_cl, x.to(memory_format=torch.channels_last), opt.num_iters, opt.warmup)
+
+    print('netG = %s, batch_size = %d, load_size = %d, threads = %d' % (opt.netG, opt.batch_size, opt.load_size, torch.get_num_threads()))
+    print('NCHW          : %8.2f ms/batch, %8.2f ms/image' % (time_nchw * 1e3, time_nchw * 1e3 / opt.batch_size))
+    print('channels-last : %8.2f ms/batch, %8.2f ms/image' % (time_nhwc * 1e3, time_nhwc * 1e3 / opt.batch_size))
+    print('speedup       : %8.2fx' % (time_nchw / time_nhwc))
+    print('max abs diff  : %.2e' % (out_nchw - out_nhwc).abs().max().item())
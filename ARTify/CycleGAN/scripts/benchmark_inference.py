@@ -0,0 +1,200 @@
+"""Benchmark the CPU inference of the test model over batch sizes, input resolutions, thread counts and backends.
+
+The checkpoints folders of the repository hold no weights, so the benchmark runs on a synthetic checkpoint: a
+randomly initialized generator built with networks.define_G and saved as
+[fixtures_dir]/benchmark_synthetic_[netG]_ngf[ngf]/latest_net_G.pth (the speed does not depend on the weights).
+Every configuration of the sweep builds the test model exactly as test.py does and runs in its own process, so its
+peak resident memory (RSS) and its thread settings are its own.
+
+Backends:
+    eager          -- the fp32 torch generator
+    channels_last  -- the fp32 torch generator in channels-last memory format (--channels_last)
+    bf16           -- bfloat16 autocast (--bf16); skipped on CPUs without native bfloat16 support
+    static         -- static INT8 quantization (--quantize static), calibrated on --calibration_dir
+    jit            -- the frozen TorchScript generator (--jit)
+    onnxruntime    -- the ONNX Runtime session (--backend onnxruntime); skipped if onnxruntime is not installed
+The accuracy guards of quantization and bfloat16 are disabled, as the random weights would fail them. If static
+quantization is not possible on this machine, the generator runs in fp32 and its results are labeled 'static-fp32'.
+
+For every configuration, the JSON results hold the throughput (images/sec), the p50 / p99 latency of a batch and the
+peak RSS of the process, along with a description of the machine. With --baseline, the throughput is compared with a
+previous result file (e.g. of the last release) and the script exits with status 1 if a configuration got slower
+than --tolerance allows.
+
+Example:
+    python scripts/benchmark_inference.py --output ./results/benchmark.json
+    python scripts/benchmark_inference.py --batch_sizes 1,4,8 --load_sizes 256,512 --num_threads 1,4,8 --backends eager,static,jit
+    python scripts/benchmark_inference.py --baseline release.json --tolerance 0.1
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import platform
+import itertools
+import contextlib
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # run from the CycleGAN folder or anywhere else
+from models import networks, bf16
+
+BACKEND_ARGS = {
+    'eager': [],
+    'channels_last': ['--channels_last'],
+    'bf16': ['--bf16', '--bf16_min_psnr', '0', '--bf16_min_ssim', '-1'],
+    'static': ['--quantize', 'static', '--quantize_min_psnr', '0', '--quantize_min_ssim', '-1'],
+    'jit': ['--jit'],
+    'onnxruntime': ['--backend', 'onnxruntime'],
+}
+BENCHMARK_DIR = os.path.join(tempfile.gettempdir(), 'cyclegan_benchmark')
+
+
+def get_fixture_name(netG, ngf):
+    """Return the name of the synthetic checkpoint of a generator architecture"""
+    return 'benchmark_synthetic_%s_ngf%d' % (netG, ngf)
+
+
+def create_fixture(fixtures_dir, netG, ngf):
+    """Save a randomly initialized generator as [fixtures_dir]/[fixture name]/latest_net_G.pth (once)"""
+    path = os.path.join(fixtures_dir, get_fixture_name(netG, ngf), 'latest_net_G.pth')
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        net = networks.define_G(3, 3, ngf, netG, 'instance', False, 'normal', 0.02, [])
+        torch.save(net.state_dict(), path)
+    return path
+
+
+def get_skip_reason(backend):
+    """Return why a backend cannot run on this machine, or None"""
+    if backend == 'bf16' and not bf16.cpu_supports_bf16():
+        return 'the CPU has no native bfloat16 support'
+    if backend == 'onnxruntime' and (importlib.util.find_spec('onnx') is None or importlib.util.find_spec('onnxruntime') is None):
+        return 'onnx or onnxruntime is not installed'
+    return None
+
+
+def get_peak_rss():
+    """Return the peak resident memory of the process in bytes, or None if unknown (e.g. on Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # bytes on macOS, kilobytes on Linux
+
+
+def run_config(config, opt):
+    """Build the test model of one configuration and time its forward passes; runs in a fresh process"""
+    from options.test_options import TestOptions
+    from models import create_model
+
+    torch.set_num_threads(config['num_threads'])
+    args = ['--dataroot', opt.fixtures_dir, '--name', get_fixture_name(opt.netG, opt.ngf), '--checkpoints_dir', opt.fixtures_dir,
+            '--model', 'test', '--no_dropout', '--gpu_ids', '-1', '--netG', opt.netG, '--ngf', str(opt.ngf),
+            '--load_size', str(config['load_size']), '--crop_size', str(config['load_size']),
+            '--batch_size', str(config['batch_size']), '--calibration_dir', opt.calibration_dir] + BACKEND_ARGS[config['backend']]
+    log = io.StringIO()
+    with contextlib.redirect_stdout(sys.stdout if opt.verbose else log):
+        model_opt = TestOptions().parse(args)
+        model_opt.num_threads = 0
+        start = time.perf_counter()
+        model = create_model(model_opt)
+        model.setup(model_opt)
+        model.eval()
+        load_time = time.perf_counter() - start
+    if config['backend'] == 'static' and not model.quantized:  # fp32 fallback: not comparable with quantized results
+        config = dict(config, backend='static-fp32')
+
+    x = torch.rand(config['batch_size'], 3, config['load_size'], config['load_size']) * 2 - 1
+    times = []
+    for i in range(opt.warmup + opt.num_iters):
+        start = time.perf_counter()
+        model.set_input({'A': x, 'A_paths': []})
+        model.test()
+        if i >= opt.warmup:
+            times.append(time.perf_counter() - start)
+    times.sort()
+    return dict(config, load_time=load_time, images_per_sec=config['batch_size'] * len(times) / sum(times),
+                latency_p50=times[len(times) // 2], latency_p99=times[min(len(times) - 1, int(0.99 * len(times)))],
+                peak_rss=get_peak_rss())
+
+
+def get_machine():
+    """Return a description of the machine and of the software the results depend on"""
+    return {'platform': platform.platform(), 'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count(), 'python': platform.python_version(), 'torch': torch.__version__,
+            'bf16': bf16.cpu_supports_bf16()}
+
+
+def compare(results, baseline, tolerance):
+    """Print the throughput change against the baseline results; return the configurations that got slower than tolerance allows"""
+    keys = ('backend', 'batch_size', 'load_size', 'num_threads')
+    previous = {tuple(result[key] for key in keys): result for result in baseline['results'] if 'images_per_sec' in result}
+    regressions = []
+    for result in results:
+        old = previous.get(tuple(result[key] for key in keys))
+        if old is None or 'images_per_sec' not in result:
+            continue
+        change = result['images_per_sec'] / old['images_per_sec'] - 1
+        print('%-14s batch %3d  size %5d  threads %3d : %+7.1f%%' % (result['backend'], result['batch_size'],
+                                                                  result['load_size'], result['num_threads'], 100 * change))
+        if change < -tolerance:
+            regressions.append(result)
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--backends', type=str, default='eager,static,jit', help='comma-separated backends [%s]' % ' | '.join(BACKEND_ARGS))
+    parser.add_argument('--batch_sizes', type=str, default='1,4', help='comma-separated images per forward pass')
+    parser.add_argument('--load_sizes', type=str, default='256,512', help='comma-separated input resolutions (multiples of 4)')
+    parser.add_argument('--num_threads', type=str, default='1,%d' % (os.cpu_count() or 1), help='comma-separated intra-op thread counts')
+    parser.add_argument('--netG', type=str, default='resnet_9blocks', help='generator architecture of the synthetic checkpoint')
+    parser.add_argument('--ngf', type=int, default=64, help='# of gen filters in the last conv layer of the synthetic checkpoint')
+    parser.add_argument('--num_iters', type=int, default=20, help='timed forward passes per configuration')
+    parser.add_argument('--warmup', type=int, default=2, help='untimed forward passes per configuration')
+    parser.add_argument('--fixtures_dir', type=str, default=os.path.join(BENCHMARK_DIR, 'fixtures'), help='the synthetic checkpoints and its cached artifacts are saved here')
+    parser.add_argument('--calibration_dir', type=str, default=os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'database', 'examples'), help='calibration images of static quantization')
+    parser.add_argument('--output', type=str, default=os.path.join(BENCHMARK_DIR, 'results.json'), help='the JSON results are saved here')
+    parser.add_argument('--baseline', type=str, default='', help='optional JSON results to compare the throughput with')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='relative throughput loss against the baseline reported as a regression')
+    parser.add_argument('--verbose', action='store_true', help='print the options and messages of the test model')
+    opt = parser.parse_args()
+    opt.fixtures_dir = os.path.abspath(opt.fixtures_dir)
+
+    create_fixture(opt.fixtures_dir, opt.netG, opt.ngf)
+    os.makedirs(os.path.dirname(os.path.abspath(opt.output)), exist_ok=True)
+    sweep = itertools.product(opt.backends.split(','), [int(v) for v in opt.batch_sizes.split(',')],
+                              [int(v) for v in opt.load_sizes.split(',')], [int(v) for v in opt.num_threads.split(',')])
+    results = []
+    for backend, batch_size, load_size, num_threads in sweep:
+        config = {'backend': backend, 'batch_size': batch_size, 'load_size': load_size, 'num_threads': num_threads}
+        reason = get_skip_reason(backend)
+        if reason is not None:
+            results.append(dict(config, skipped=reason))
+            print('%-14s batch %3d  size %5d  threads %3d : skipped (%s)' % (backend, batch_size, load_size, num_threads, reason))
+            continue
+        # a fresh process per configuration: its own peak RSS and thread pools
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            result = executor.submit(run_config, config, opt).result()
+        results.append(result)
+        print('%-14s batch %3d  size %5d  threads %3d : %8.2f images/s  p50 %8.1f ms  p99 %8.1f ms  peak RSS %s' % (
+            backend, batch_size, load_size, num_threads, result['images_per_sec'], result['latency_p50'] * 1e3,
+            result['latency_p99'] * 1e3, '%.0f MB' % (result['peak_rss'] / 2 ** 20) if result['peak_rss'] else 'n/a'))
+
+    with open(opt.output, 'w') as f:
+        json.dump({'machine': get_machine(), 'options': vars(opt), 'results': results}, f, indent=2)
+    print('saved the results to %s' % opt.output)
+
+    if opt.baseline:
+        with open(opt.baseline) as f:
+            regressions = compare(results, json.load(f), opt.tolerance)
+        if regressions:
+            print('%d configuration(s) are more than %.0f%% slower than the baseline' % (len(regressions), 100 * opt.tolerance))
+            sys.exit(1)
@@ -0,0 +1,111 @@
+"""Distill a pretrained generator (the teacher) into a smaller, faster generator (the student).
+
+The student is trained to reproduce the outputs of the teacher on a folder of unlabeled images (L1 loss), so no
+style images or discriminator are needed. It is saved as [epoch]_net_G_student.pth next to the teacher, where the
+test model loads it with '--fast' (see options '--fast', '--student_netG' and '--student_ngf' in models/test_model.py).
+
+Example:
+    python scripts/distill_student.py --dataroot ../database/examples --name style_monet_pretrained
+    python scripts/distill_student.py --dataroot ./photos --name style_vangogh_pretrained --netG resnet_6blocks --ngf 16 --n_epochs 50
+
+The last --num_val images of the folder are not trained on; the PSNR / SSIM of the student against the teacher on
+these images is printed after every epoch. A few hundred varied photos are enough for a usable student.
+"""
+import os
+import sys
+import time
+import argparse
+import torch
+from torch.utils.data import DataLoader, Subset
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # run from the CycleGAN folder or anywhere else
+from models import networks, fast_load
+from data.base_dataset import get_transform
+from data.image_folder import ImageFolder
+from util import util
+
+
+def evaluate(student, teacher_outputs, images, batch_size):
+    """Return the PSNR and SSIM of the student outputs against the teacher outputs"""
+    student.eval()
+    with torch.no_grad():
+        outputs = torch.cat([student(images[i:i + batch_size]) for i in range(0, len(images), batch_size)])
+    student.train()
+    return util.psnr(teacher_outputs, outputs), util.ssim(teacher_outputs, outputs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--dataroot', type=str, required=True, help='folder of training images (searched recursively)')
+    parser.add_argument('--name', type=str, required=True, help='teacher model folder in checkpoints_dir, e.g. style_monet_pretrained')
+    parser.add_argument('--checkpoints_dir', type=str, default='./checkpoints', help='models are saved here')
+    parser.add_argument('--epoch', type=str, default='latest', help='teacher epoch to load; the student is saved as [epoch]_net_G_student.pth')
+    parser.add_argument('--teacher_netG', type=str, default='resnet_9blocks', help='teacher generator architecture')
+    parser.add_argument('--teacher_ngf', type=int, default=64, help='# of teacher gen filters in the last conv layer')
+    parser.add_argument('--netG', type=str, default='resnet_6blocks', help='student generator architecture [resnet_9blocks | resnet_6blocks | unet_256 | unet_128]')
+    parser.add_argument('--ngf', type=int, default=32, help='# of student gen filters in the last conv layer')
+    parser.add_argument('--load_size', type=int, default=286, help='scale training images to this size')
+    parser.add_argument('--crop_size', type=int, default=256, help='then crop to this size')
+    parser.add_argument('--batch_size', type=int, default=4, help='input batch size')
+    parser.add_argument('--n_epochs', type=int, default=20, help='number of epochs with the initial learning rate')
+    parser.add_argument('--n_epochs_decay', type=int, default=20, help='number of epochs to linearly decay the learning rate to zero')
+    parser.add_argument('--lr', type=float, default=0.0002, help='initial learning rate for adam')
+    parser.add_argument('--beta1', type=float, default=0.5, help='momentum term of adam')
+    parser.add_argument('--num_val', type=int, default=8, help='images held out to evaluate the student')
+    parser.add_argument('--num_threads', type=int, default=4, help='# threads for loading data')
+    parser.add_argument('--gpu_ids', type=str, default='-1', help='gpu id: e.g. 0. use -1 for CPU')
+    opt = parser.parse_args()
+
+    device = torch.device('cuda:%s' % opt.gpu_ids.split(',')[0] if opt.gpu_ids != '-1' else 'cpu')
+    expr_dir = os.path.join(opt.checkpoints_dir, opt.name)
+    teacher_path = os.path.join(expr_dir, '%s_net_G.pth' % opt.epoch)
+    student_path = os.path.join(expr_dir, '%s_net_G_student.pth' % opt.epoch)
+
+    # teacher and student, without dropout as at test time
+    teacher = networks.define_G(3, 3, opt.teacher_ngf, opt.teacher_netG, 'instance', False, None, 0.02, [])
+    # pretrained checkpoints saved before PyTorch 0.4 hold InstanceNorm entries the current layers do not have
+    teacher.load_state_dict(fast_load.patch_state_dict(torch.load(teacher_path, map_location='cpu'), teacher))
+    teacher.to(device).eval().requires_grad_(False)
+    student = networks.define_G(3, 3, opt.ngf, opt.netG, 'instance', False, 'normal', 0.02, []).to(device)
+    student.train()
+
+    # random crops and flips for training, the test-time preprocessing for evaluation
+    train_transform = get_transform(argparse.Namespace(preprocess='resize_and_crop', load_size=opt.load_size,
+                                                       crop_size=opt.crop_size, no_flip=False))
+    val_transform = get_transform(argparse.Namespace(preprocess='resize_and_crop', load_size=opt.crop_size,
+                                                     crop_size=opt.crop_size, no_flip=True))
+    num_images = len(ImageFolder(opt.dataroot))
+    assert num_images > opt.num_val, 'need more than --num_val images in %s' % opt.dataroot
+    train_set = Subset(ImageFolder(opt.dataroot, train_transform), range(num_images - opt.num_val))
+    val_set = Subset(ImageFolder(opt.dataroot, val_transform), range(num_images - opt.num_val, num_images))
+    loader = DataLoader(train_set, batch_size=opt.batch_size, shuffle=True, num_workers=opt.num_threads, drop_last=len(train_set) > opt.batch_size)
+    val_images = torch.stack([val_set[i] for i in range(len(val_set))]).to(device)
+    with torch.no_grad():
+        val_targets = torch.cat([teacher(val_images[i:i + opt.batch_size]) for i in range(0, len(val_images), opt.batch_size)])
+
+    # same optimizer and linear learning rate decay as CycleGAN training
+    optimizer = torch.optim.Adam(student.parameters(), lr=opt.lr, betas=(opt.beta1, 0.999))
+    scheduler = torch.optim.lr_scheduler.LambdaLR(optimizer, lambda epoch: 1.0 - max(0, epoch + 1 - opt.n_epochs) / float(opt.n_epochs_decay + 1))
+    criterion = torch.nn.L1Loss()
+
+    print('distilling %s (%s, ngf=%d) into %s (%s, ngf=%d) on %d images' % (teacher_path, opt.teacher_netG, opt.teacher_ngf,
+                                                                          student_path, opt.netG, opt.ngf, len(train_set)))
+    for epoch in range(1, opt.n_epochs + opt.n_epochs_decay + 1):
+        start, total_loss = time.time(), 0.0
+        for images in loader:
+            images = images.to(device)
+            with torch.no_grad():
+                targets = teacher(images)
+            loss = criterion(student(images), targets)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(images)
+        scheduler.step()
+        psnr, ssim = evaluate(student, val_targets, val_images, opt.batch_size)
+        print('epoch %d / %d: L1 = %.4f, val PSNR = %.2f dB, val SSIM = %.4f, lr = %.7f, time = %.1f s'
+              % (epoch, opt.n_epochs + opt.n_epochs_decay, total_loss / len(train_set), psnr, ssim,
+                 optimizer.param_groups[0]['lr'], time.time() - start))
+        torch.save(student.cpu().state_dict(), student_path)  # saved on CPU as <BaseModel.save_networks> does
+        student.to(device)
+    print('saved the student to %s' % student_path)
@@ -19,6 +19,10 @@ Example (You need to train models first or download pre-trained models from our
     which is sometimes unnecessary. The results will be saved at ./results/.
     Use '--results_dir <directory_path_to_save_result>' to specify the results directory.
 
+    Test without the HTML report (only the fake images are saved, to <results_dir>/<name>):
+        python test.py --dataroot datasets/horse2zebra/testA --name horse2zebra_pretrained --model test --no_dropout --headless
+    Other programs can call <run_inference> to get the fake images in memory and persist them as they see fit.
+
     Test a pix2pix model:
         python test.py --dataroot ./datasets/facades --name facades_pix2pix --model pix2pix --direction BtoA
 
@@ -31,7 +35,8 @@ from options.test_options import TestOptions
 from data import create_dataset
 from models import create_model
 from util.visualizer import save_images
-from util import html
+from util import html, util
+from util.encoding import EncodingPool
 
 try:
     import wandb
@@ -39,42 +44,89 @@ except ImportError:
     print('Warning: wandb package cannot be found. The option "--use_wandb" will result in error.')
 
 
+def limit_batch(data, num_images):
+    """Return the batch of the data loader cut down to its first num_images images (so exactly opt.num_test images are processed)"""
+    if len(data['A_paths']) <= num_images:
+        return data
+    return {key: value[:num_images] for key, value in data.items()}
+
+
+def run_inference(opt, model, dataset, as_numpy=True):
+    """Run the model over the dataset and yield its fake images in memory, batch by batch
+
+    Parameters:
+        opt (Option class)   -- the test options; only the first opt.num_test images are processed
+        model (BaseModel)    -- the set up test model; with --headless it keeps no real images as visuals
+        dataset              -- the dataset returned by <create_dataset>
+        as_numpy (bool)      -- yield RGB uint8 numpy arrays (HWC) if True, the NCHW output tensor of the batch otherwise
+
+    Yields (image_paths, images) for every batch, one image per path. Nothing is written to the disk.
+    """
+    for i, data in enumerate(dataset):
+        if i * opt.batch_size >= opt.num_test:  # only apply our model to opt.num_test images.
+            break
+        model.set_input(limit_batch(data, opt.num_test - i * opt.batch_size))
+        model.test()
+        fake = model.get_current_visuals()['fake']
+        yield model.get_image_paths(), util.tensors2im(fake) if as_numpy else fake
+
+
 if __name__ == '__main__':
     opt = TestOptions().parse()  # get test options
     # hard-code some parameters for test
     opt.num_threads = 0   # test code only supports num_threads = 0
-    opt.batch_size = 1    # test code only supports batch_size = 1
+    if getattr(opt, 'tile_size', 0) > 0:
+        opt.batch_size = 1  # full-resolution images differ in size; their tiles are batched by the model
+    elif 'crop' not in opt.preprocess and opt.preprocess != 'resize':
+        opt.batch_size = 1  # without a fixed output size (e.g. none, scale_width) images differ in size and cannot be stacked
+    else:
+        opt.batch_size = util.get_batch_size(opt, opt.num_test)  # images are stacked and run through netG in one forward pass
     opt.serial_batches = True  # disable data shuffling; comment this line if results on randomly chosen images are needed.
     opt.no_flip = True    # no flip; comment this line if results on flipped images are needed.
     opt.display_id = -1   # no visdom display; the test code saves the results to a HTML file.
     dataset = create_dataset(opt)  # create a dataset given opt.dataset_mode and other options
     model = create_model(opt)      # create a model given opt.model and other options
     model.setup(opt)               # regular setup: load and print networks; create schedulers
+    encoder = EncodingPool(opt.num_encode_threads)  # encodes the images of a batch while the next batch runs
 
-    # initialize logger
-    if opt.use_wandb:
-        wandb_run = wandb.init(project=opt.wandb_project_name, name=opt.name, config=opt) if not wandb.run else wandb.run
-        wandb_run._label(repo='CycleGAN-and-pix2pix')
-
-    # create a website
-    web_dir = os.path.join(opt.results_dir, opt.name, '{}_{}'.format(opt.phase, opt.epoch))  # define the website directory
-    if opt.load_iter > 0:  # load_iter is 0 by default
-        web_dir = '{:s}_iter{:d}'.format(web_dir, opt.load_iter)
-    print('creating web directory', web_dir)
-    webpage = html.HTML(web_dir, 'Experiment = %s, Phase = %s, Epoch = %s' % (opt.name, opt.phase, opt.epoch))
     # test with eval mode. This only affects layers like batchnorm and dropout.
     # For [pix2pix]: we use batchnorm and dropout in the original pix2pix. You can experiment it with and without eval() mode.
     # For [CycleGAN]: It should not affect CycleGAN as CycleGAN uses instancenorm without dropout.
     if opt.eval:
         model.eval()
-    for i, data in enumerate(dataset):
-        if i >= opt.num_test:  # only apply our model to opt.num_test images.
-            break
-        model.set_input(data)  # unpack data from data loader
-        model.test()           # run inference
-        visuals = model.get_current_visuals()  # get image results
-        img_path = model.get_image_paths()     # get image paths
-        if i % 5 == 0:  # save images to an HTML file
-            print('processing (%04d)-th image... %s' % (i, img_path))
-        save_images(webpage, visuals, img_path, aspect_ratio=opt.aspect_ratio, width=opt.display_winsize, use_wandb=opt.use_wandb)
-    webpage.save()  # save the HTML
+
+    if opt.headless:  # no webpage and no real images; only the fake images are encoded and saved
+        save_dir = os.path.join(opt.results_dir, opt.name)
+        os.makedirs(save_dir, exist_ok=True)
+        for img_path, images in run_inference(opt, model, dataset):
+            print('processing %s' % img_path)
+            for path, image in zip(img_path, images):
+                encoder.save_image(image, os.path.join(save_dir, '%s_fake.png' % os.path.splitext(os.path.basename(path))[0]),
+                                   aspect_ratio=opt.aspect_ratio, compress_level=opt.png_compress_level)
+        encoder.close()  # wait until all images are saved
+    else:
+        # initialize logger
+        if opt.use_wandb:
+            wandb_run = wandb.init(project=opt.wandb_project_name, name=opt.name, config=opt) if not wandb.run else wandb.run
+            wandb_run._label(repo='CycleGAN-and-pix2pix')
+
+        # create a website
+        save_dir = os.path.join(opt.results_dir, opt.name, '{}_{}'.format(opt.phase, opt.epoch))  # define the website directory
+        if opt.load_iter > 0:  # load_iter is 0 by default
+            save_dir = '{:s}_iter{:d}'.format(save_dir, opt.load_iter)
+        print('creating web directory', save_dir)
+        webpage = html.HTML(save_dir, 'Experiment = %s, Phase = %s, Epoch = %s' % (opt.name, opt.phase, opt.epoch))
+        for i, data in enumerate(dataset):
+            if i * opt.batch_size >= opt.num_test:  # only apply our model to opt.num_test images.
+                break
+            model.set_input(limit_batch(data, opt.num_test - i * opt.batch_size))  # unpack data from data loader
+            model.test()           # run inference
+            visuals = model.get_current_visuals()  # get image results
+            img_path = model.get_image_paths()     # get image paths
+            print('processing (%04d)-th batch... %s' % (i, img_path))
+            save_images(webpage, visuals, img_path, aspect_ratio=opt.aspect_ratio, width=opt.display_winsize, use_wandb=opt.use_wandb,
+                        encoder=encoder, compress_level=opt.png_compress_level)
+        encoder.close()  # wait until all images are saved
+        webpage.save()  # save the HTML
+    if hasattr(model, 'save_profile'):
+        model.save_profile(save_dir)  # per-layer profile of the generator, if requested with --profile
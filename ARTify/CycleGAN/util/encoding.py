@@ -0,0 +1,85 @@
+"""This module encodes and saves output images in a pool of threads, overlapped with inference.
+
+PNG compression (zlib) releases the GIL in PIL and OpenCV, so while the forward pass of the next batch runs, the
+images of the previous batch are encoded on other cores. The number of images waiting to be encoded is bounded
+(backpressure): when inference outruns encoding, <EncodingPool.submit> blocks until a slot is free, so the memory
+held by pending images stays bounded.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class EncodingPool():
+    """Runs encoding tasks (e.g. <save_image>) in background threads with a bounded number of pending tasks"""
+
+    def __init__(self, num_workers=4, max_pending=0):
+        """Create the pool
+
+        Parameters:
+            num_workers (int)  -- encoding threads; 0 runs every task synchronously in the calling thread
+            max_pending (int)  -- tasks submitted but not finished before <submit> blocks; 0 uses 2 * num_workers
+        """
+        self.num_workers = num_workers
+        self.executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix='encode') if num_workers > 0 else None
+        self.slots = threading.BoundedSemaphore(max_pending or 2 * max(1, num_workers))
+        self.lock = threading.Lock()
+        self.futures = set()
+        self.errors = []
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) in the pool; blocks while the maximum number of tasks is pending
+
+        An exception raised by a task is raised again by <wait> (or <close>).
+        """
+        if self.executor is None:
+            fn(*args, **kwargs)
+            return
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.futures.add(future)
+        future.add_done_callback(self.on_done)
+
+    def on_done(self, future):
+        with self.lock:
+            self.futures.discard(future)
+            if future.exception() is not None:
+                self.errors.append(future.exception())
+        self.slots.release()
+
+    def save_image(self, image_numpy, image_path, aspect_ratio=1.0, compress_level=6):
+        """Save a numpy image to the disk in the pool (see <util.save_image>)"""
+        from . import util  # imports torch; only when the pool saves images itself
+        self.submit(util.save_image, image_numpy, image_path, aspect_ratio=aspect_ratio, compress_level=compress_level)
+
+    def wait(self):
+        """Wait until all submitted tasks are done and raise the first error of a task, if any"""
+        while True:
+            with self.lock:
+                futures = list(self.futures)
+            if not futures:
+                break
+            for future in futures:
+                future.exception()  # waits for the task
+        with self.lock:
+            errors, self.errors = self.errors, []
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        """Wait for the pending tasks and stop the threads"""
+        try:
+            self.wait()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
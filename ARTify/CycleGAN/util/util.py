@@ -1,9 +1,12 @@
 """This module contains simple helper functions """
 from __future__ import print_function
+import math
 import torch
+import torch.nn.functional as F
 import numpy as np
 from PIL import Image
 import os
+import sys
 
 
 def tensor2im(input_image, imtype=np.uint8):
@@ -18,15 +21,33 @@ def tensor2im(input_image, imtype=np.uint8):
             image_tensor = input_image.data
         else:
             return input_image
-        image_numpy = image_tensor[0].cpu().float().numpy()  # convert it into a numpy array
-        if image_numpy.shape[0] == 1:  # grayscale to RGB
-            image_numpy = np.tile(image_numpy, (3, 1, 1))
-        image_numpy = (np.transpose(image_numpy, (1, 2, 0)) + 1) / 2.0 * 255.0  # post-processing: tranpose and scaling
+        image_numpy = image_tensor[0].cpu().float().permute(1, 2, 0).numpy()  # convert it into a HWC numpy array (a view for channels-last tensors)
+        if image_numpy.shape[2] == 1:  # grayscale to RGB
+            image_numpy = np.tile(image_numpy, (1, 1, 3))
+        image_numpy = (image_numpy + 1) / 2.0 * 255.0  # post-processing: scaling
     else:  # if it is a numpy array, do nothing
         image_numpy = input_image
     return image_numpy.astype(imtype)
 
 
+def tensors2im(input_images):
+    """Converts a batch of image tensors into uint8 numpy images at once
+
+    Parameters:
+        input_images (tensor) -- the NCHW image batch, in [-1, 1]
+
+    Returns a list of HWC uint8 numpy arrays, one per image. The rescaling, clamping and quantization run in torch
+    over the whole batch, and the arrays are views of a single NHWC uint8 tensor (no copy per image).
+    The values are the same as those of <tensor2im>.
+    """
+    images = input_images.detach().to('cpu', torch.float32)
+    images = images.add(1).div_(2).mul_(255).clamp_(0, 255).to(torch.uint8)  # truncated, as astype(np.uint8)
+    if images.shape[1] == 1:  # grayscale to RGB
+        images = images.expand(-1, 3, -1, -1)
+    images_numpy = images.permute(0, 2, 3, 1).contiguous().numpy()  # one NHWC copy (none for channels-last RGB batches)
+    return list(images_numpy)
+
+
 def diagnose_network(net, name='network'):
     """Calculate and print the mean of average absolute(gradients)
 
@@ -46,12 +67,13 @@ def diagnose_network(net, name='network'):
     print(mean)
 
 
-def save_image(image_numpy, image_path, aspect_ratio=1.0):
+def save_image(image_numpy, image_path, aspect_ratio=1.0, compress_level=6):
     """Save a numpy image to the disk
 
     Parameters:
         image_numpy (numpy array) -- input numpy array
         image_path (str)          -- the path of the image
+        compress_level (int)      -- zlib level of PNG images, from 0 (fastest, largest) to 9 (slowest, smallest)
     """
 
     image_pil = Image.fromarray(image_numpy)
@@ -61,7 +83,97 @@ def save_image(image_numpy, image_path, aspect_ratio=1.0):
         image_pil = image_pil.resize((h, int(w * aspect_ratio)), Image.BICUBIC)
     if aspect_ratio < 1.0:
         image_pil = image_pil.resize((int(h / aspect_ratio), w), Image.BICUBIC)
-    image_pil.save(image_path)
+    image_pil.save(image_path, compress_level=compress_level)
+
+
+def get_available_memory():
+    """Return the available physical memory in bytes, or None if it cannot be determined on this platform"""
+    try:  # Linux
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        pass
+    if sys.platform == 'win32':
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+    return None
+
+
+def get_batch_size(opt, num_images, memory_fraction=0.25, max_batch_size=16, image_size=None, batch_size=None):
+    """Return the batch size used for inference
+
+    Parameters:
+        opt (Option class)      -- stores all the experiment flags; opt.batch_size <= 0 picks the batch size automatically
+        num_images (int)        -- the number of images to process; the batch size never exceeds it
+        memory_fraction (float) -- the fraction of the available memory the activations of a batch may use
+        max_batch_size (int)    -- upper bound for an automatically picked batch size
+        image_size (int)        -- the side of the (square) images; opt.crop_size if None
+        batch_size (int)        -- the requested batch size (<= 0 picks it automatically); opt.batch_size if None
+
+    The automatic batch size assumes that about eight float32 feature maps of the first generator layer
+    (ngf x image_size x image_size) are alive at the same time for every image of the batch.
+    """
+    batch_size = opt.batch_size if batch_size is None else batch_size
+    if batch_size > 0:
+        return batch_size
+    if len(opt.gpu_ids) > 0:
+        available = torch.cuda.mem_get_info(opt.gpu_ids[0])[0]
+    else:
+        available = get_available_memory()
+    if available is None:  # unknown platform: use a small batch that fits on any machine
+        batch_size = 4
+    else:
+        image_size = image_size or opt.crop_size
+        bytes_per_image = 8 * opt.ngf * image_size * image_size * 4
+        batch_size = int(available * memory_fraction) // bytes_per_image
+    return max(1, min(batch_size, max_batch_size, num_images))
+
+
+def psnr(image_a, image_b):
+    """Return the peak signal-to-noise ratio (in dB) between two image tensors in [-1, 1]"""
+    mse = torch.mean(((image_a.float() - image_b.float()) / 2.0) ** 2).item()
+    if mse == 0:
+        return float('inf')
+    return 10 * math.log10(1.0 / mse)
+
+
+def ssim(image_a, image_b, window_size=11, sigma=1.5):
+    """Return the mean structural similarity between two NCHW image tensors in [-1, 1]
+
+    Parameters:
+        image_a (tensor)    -- the reference images
+        image_b (tensor)    -- the images to compare
+        window_size (int)   -- the size of the Gaussian window
+        sigma (float)       -- the standard deviation of the Gaussian window
+    """
+    a = (image_a.float() + 1) / 2.0
+    b = (image_b.float() + 1) / 2.0
+    channels = a.shape[1]
+    coords = torch.arange(window_size, dtype=torch.float32, device=a.device) - window_size // 2
+    gauss = torch.exp(-coords ** 2 / (2 * sigma ** 2))
+    gauss = gauss / gauss.sum()
+    window = (gauss[:, None] * gauss[None, :]).expand(channels, 1, window_size, window_size)
+
+    def filter2d(x):
+        return F.conv2d(x, window, groups=channels)
+
+    mu_a, mu_b = filter2d(a), filter2d(b)
+    var_a = filter2d(a * a) - mu_a ** 2
+    var_b = filter2d(b * b) - mu_b ** 2
+    cov_ab = filter2d(a * b) - mu_a * mu_b
+    c1, c2 = 0.01 ** 2, 0.03 ** 2
+    ssim_map = ((2 * mu_a * mu_b + c1) * (2 * cov_ab + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return ssim_map.mean().item()
 
 
 def print_numpy(x, val=True, shp=False):
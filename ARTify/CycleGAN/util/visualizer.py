@@ -18,38 +18,48 @@ else:
     VisdomExceptionBase = ConnectionError
 
 
-def save_images(webpage, visuals, image_path, aspect_ratio=1.0, width=256, use_wandb=False):
+def save_images(webpage, visuals, image_path, aspect_ratio=1.0, width=256, use_wandb=False, encoder=None, compress_level=6):
     """Save images to the disk.
 
     Parameters:
         webpage (the HTML class) -- the HTML webpage class that stores these imaegs (see html.py for more details)
         visuals (OrderedDict)    -- an ordered dictionary that stores (name, images (either tensor or numpy) ) pairs
-        image_path (str)         -- the string is used to create image paths
+        image_path (str list)    -- the strings are used to create image paths; one per image in the batch
         aspect_ratio (float)     -- the aspect ratio of saved images
         width (int)              -- the images will be resized to width x width
+        encoder (EncodingPool)   -- if given, the images are encoded and saved in its threads (see encoding.py)
+        compress_level (int)     -- zlib level of the PNG images (0-9)
 
     This function will save images stored in 'visuals' to the HTML file specified by 'webpage'.
+    Tensors in 'visuals' can hold a batch of images; the i-th image is saved under the name of image_path[i].
     """
     image_dir = webpage.get_image_dir()
-    short_path = ntpath.basename(image_path[0])
-    name = os.path.splitext(short_path)[0]
+    # convert every batch of tensors at once; a numpy image (HWC) is saved as it is
+    images = {label: util.tensors2im(im_data) if hasattr(im_data, 'detach') else [im_data]
+              for label, im_data in visuals.items()}
+    for i, path in enumerate(image_path):
+        short_path = ntpath.basename(path)
+        name = os.path.splitext(short_path)[0]
 
-    webpage.add_header(name)
-    ims, txts, links = [], [], []
-    ims_dict = {}
-    for label, im_data in visuals.items():
-        im = util.tensor2im(im_data)
-        image_name = '%s_%s.png' % (name, label)
-        save_path = os.path.join(image_dir, image_name)
-        util.save_image(im, save_path, aspect_ratio=aspect_ratio)
-        ims.append(image_name)
-        txts.append(label)
-        links.append(image_name)
+        webpage.add_header(name)
+        ims, txts, links = [], [], []
+        ims_dict = {}
+        for label in visuals:
+            im = images[label][i]
+            image_name = '%s_%s.png' % (name, label)
+            save_path = os.path.join(image_dir, image_name)
+            if encoder is not None:
+                encoder.save_image(im, save_path, aspect_ratio=aspect_ratio, compress_level=compress_level)
+            else:
+                util.save_image(im, save_path, aspect_ratio=aspect_ratio, compress_level=compress_level)
+            ims.append(image_name)
+            txts.append(label)
+            links.append(image_name)
+            if use_wandb:
+                ims_dict[label] = wandb.Image(im)
+        webpage.add_images(ims, txts, links, width=width)
         if use_wandb:
-            ims_dict[label] = wandb.Image(im)
-    webpage.add_images(ims, txts, links, width=width)
-    if use_wandb:
-        wandb.log(ims_dict)
+            wandb.log(ims_dict)
 
 
 class Visualizer():
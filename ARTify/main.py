@@ -9,7 +9,7 @@ and displaying the main window.
 """
 
 # Import PyQT5 for GUI
-from PyQt5.QtWidgets import QApplication, QMainWindow
+from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import Qt
 
@@ -22,6 +22,11 @@ from ui.upload_page import UploadPage, NewUploadPage, SampleSelectionPage, Progr
 from ui.workspace_page import WorkspacePage, EditorPage
 from ui.gallery_page import GalleryPage
 
+# Import CycleGAN style engine, result cache and duplicate index
+from utils.style_engine import StyleEngine
+from utils.result_cache import ResultCache
+from utils.duplicate_index import DuplicateIndex
+
 
 class ArtStudioApp(QMainWindow):
     """
@@ -41,6 +46,18 @@ class ArtStudioApp(QMainWindow):
         self.setWindowIcon(QIcon("assets/app_icon.ico"))
         # Set scalable size and center the window
         self.resize_and_center()
+        # Style transfer engine shared by all processing jobs (models load in the background and stay loaded between jobs),
+        # with the backend, workers and batch size tuned for this machine (tuned in the background on the first start)
+        self.style_engine = StyleEngine(autotune=True)
+        self.style_engine.preload()
+        # Stylized images of previous jobs, reused when the same image is processed again
+        self.result_cache = ResultCache()
+        # Perceptual hashes of the processed originals, to recognize images uploaded again
+        self.duplicate_index = DuplicateIndex()
+        # Whether a processing job is still adding images to the workspace (only one job runs at a time)
+        self.processing = False
+        # Threads and workers of the running jobs, owned by the window as they outlive their progress bar page
+        self.jobs = []
         # Display the main page on startup
         self.show_main_page()
 
@@ -104,7 +121,7 @@ class ArtStudioApp(QMainWindow):
         Displays the New Upload Page for uploading user-selected images.
         """
         # Instantiate new upload page
-        self.new_upload_page = NewUploadPage()
+        self.new_upload_page = NewUploadPage(self.duplicate_index)
 
         # Connect signals from new upload page to navigate to different sections
         self.new_upload_page.go_to_main.connect(self.show_main_page)
@@ -115,6 +132,9 @@ class ArtStudioApp(QMainWindow):
         # Navigate to the progress bar page after image selection
         self.new_upload_page.go_to_progress_bar.connect(self.show_progress_bar_page)
 
+        # Navigate to the editor page of an already processed image instead of processing it again
+        self.new_upload_page.go_to_editor.connect(self.show_editor_page)
+
         # Set new upload page as central content in the window
         self.setCentralWidget(self.new_upload_page)
 
@@ -144,22 +164,54 @@ class ArtStudioApp(QMainWindow):
         Parameters:
             selected_images (list): List of selected images to process.
         """
+        # Only one job adds images to the workspace at a time
+        if self.processing:
+            QMessageBox.information(self, "Processing",
+                                    "Images are still being processed.\n"
+                                    "Please wait until they are done before processing new images.")
+            return
+
         # Instantiate progress bar page
-        self.progress_bar_page = ProgressBarPage(selected_images, self.my_sizing)
+        self.progress_bar_page = ProgressBarPage(selected_images, self.my_sizing, self.style_engine, self.result_cache)
+
+        # Keep the thread and the worker of the job alive until the thread is done, even once the page is gone
+        job = (self.progress_bar_page.thread, self.progress_bar_page.worker)
+        self.jobs.append(job)
+        self.progress_bar_page.thread.finished.connect(lambda: self.release_job(job))
 
         # Navigate to the workspace page after processing (incl. error handling)
         self.progress_bar_page.go_to_workspace.connect(self.show_workspace)
         self.progress_bar_page.go_to_main.connect(self.show_main_page)
 
+        # The generated images are added to the workspace while the remaining ones are processed
+        self.processing = True
+        self.progress_bar_page.worker.image_ready.connect(self.on_image_ready)
+        self.progress_bar_page.worker.finished.connect(self.on_processing_finished)
+
         # Set progress bar page as central content in the window
         self.setCentralWidget(self.progress_bar_page)
 
+        # Start processing once all signals are connected
+        self.progress_bar_page.start_model_processing()
+
+    def release_job(self, job):
+        """
+        Drops the references to the thread and the worker of a finished job.
+
+        Parameters:
+            job (tuple): The QThread and the ModelWorker of the job.
+        """
+        thread, _ = job
+        # The finished signal is emitted just before the thread ends
+        thread.wait()
+        self.jobs.remove(job)
+
     def show_workspace(self):
         """
         Displays the Workspace Page for managing and editing images.
         """
         # Instantiate workspace page
-        self.workspace_page = WorkspacePage()
+        self.workspace_page = WorkspacePage(self.processing)
 
         # Connect signals from workspace page to navigate to different sections
         self.workspace_page.go_to_main.connect(self.show_main_page)
@@ -173,6 +225,33 @@ class ArtStudioApp(QMainWindow):
         # Set workspace page as central content in the window
         self.setCentralWidget(self.workspace_page)
 
+    def on_image_ready(self, unique_id, style):
+        """
+        Shows a newly generated image if the workspace page is displayed.
+
+        Parameters:
+            unique_id (str): The ID of the image group the image was saved in.
+            style (str): The style of the saved image.
+        """
+        if self.centralWidget() is getattr(self, "workspace_page", None):
+            self.workspace_page.update_image(unique_id, style)
+
+    def on_processing_finished(self, results):
+        """
+        Updates the workspace page once a processing job is done, and reports the styles that
+        failed after the progress bar page was left (before, the progress bar page reports them).
+
+        Parameters:
+            results (list): Processing results, including success status and the status of each style.
+        """
+        self.processing = False
+        if self.centralWidget() is getattr(self, "workspace_page", None):
+            self.workspace_page.set_processing(False)
+        if results[0] != "success" and self.centralWidget() is not self.progress_bar_page:
+            failed = [artist for artist, status in results[1].items() if status != "database/workspace"]
+            QMessageBox.warning(self, "Processing Error",
+                                "The following styles could not be applied:\n" + "\n".join(failed))
+
     def show_editor_page(self, selected_image):
         """
         Displays the Editor Page for detailed image editing.
@@ -13,22 +13,33 @@ transfer operations. The included pages and components are:
 
 
 # Import PyQT5 for GUI
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QScrollArea, QGridLayout, QPushButton, QProgressBar, QDialog, QDialogButtonBox, QSizePolicy, QTextEdit, QFileDialog, QHBoxLayout, QSpacerItem
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QScrollArea, QGridLayout, QPushButton, QProgressBar, QDialog, QDialogButtonBox, QSizePolicy, QTextEdit, QFileDialog, QHBoxLayout, QSpacerItem, QMessageBox
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QObject, QThread
 from PyQt5.QtGui import QPixmap, QImage, QFont
 
 # Import libraries
-import time
-import uuid
 import shutil
+import os
+import sys
+import threading
+import traceback
 from pathlib import Path
 import cv2
 
 # Import toolbar
 from ui.toolbar_helper import setup_toolbar
 
-# Import CycleGAN processing
-from utils.run_cycleGAN import run_test_script
+# Import CycleGAN style engine and result cache
+from utils.style_engine import CYCLEGAN_DIR, STYLES, get_model_name, scale_images
+from utils.result_cache import hash_image, get_result_key
+
+# Import the CycleGAN encoding pool (the CycleGAN packages are imported as top-level packages)
+if str(CYCLEGAN_DIR) not in sys.path:
+    sys.path.insert(0, str(CYCLEGAN_DIR))
+from util.encoding import EncodingPool
+
+# Import workspace image groups
+from utils import workspace
 
 
 class UploadPage(QWidget):
@@ -334,20 +345,26 @@ class NewUploadPage(QWidget):
     # Signal to go to the progress bar
     go_to_progress_bar = pyqtSignal(list)
 
-    def __init__(self):
+    # Signal to go to the editor page of an already processed image
+    go_to_editor = pyqtSignal(str)
+
+    def __init__(self, duplicate_index):
         """
         Initializes the NewUploadPage, setting up the directory for uploaded images
         and preparing the layout for image selection.
+
+        Parameters:
+            duplicate_index (DuplicateIndex): The app-wide index of the processed originals.
         """
 
         super().__init__()
+        # Delete the uploads of a previous session that were never processed
+        workspace.discard_pending_groups()
+        # Update the index with the images processed or deleted since the last upload (in the background)
+        self.duplicate_index = duplicate_index
+        self.duplicate_index.refresh_in_background()
         self.selected_images = []
         self.max_images = 12
-        # Create empty temporary uploads folder
-        self.folder_path = Path("temporary_data/uploads")
-        if self.folder_path.exists():
-            shutil.rmtree(self.folder_path)
-        self.folder_path.mkdir()
         self.initUI()
         self.cameras_checked = False
 
@@ -517,6 +534,9 @@ class NewUploadPage(QWidget):
         for file_path in file_paths:
             processed_path = self.process_and_save_image(file_path)
             if processed_path:
+                # Offer the existing image group instead of processing a near-duplicate again
+                if self.open_existing_image(processed_path):
+                    return
                 self.add_image(processed_path)
 
         # Update the visibility of the Next button
@@ -577,7 +597,7 @@ class NewUploadPage(QWidget):
         """
         Opens a dialog for capturing an image using the connected camera. If no
         camera has been previously checked, it initiates a check. Captured images
-        are saved in the user folder after resizing and converting them.
+        are saved as the original of a new workspace image group after resizing and converting them.
         """
 
         # Check cameras if not done previously
@@ -594,17 +614,17 @@ class NewUploadPage(QWidget):
         if camera_dialog.exec_() == QDialog.Accepted:
             frame = camera_dialog.captured_image
             if frame is not None:
-                # Generate a unique filename for the captured image
-                image_name = f"capture_{int(time.time())}_{uuid.uuid4().hex[:6]}.jpg"
-                save_path = self.folder_path / image_name
-
                 # Convert the captured frame from BGR to RGB format and resize for saving
                 frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 image = QImage(frame_rgb.data, frame_rgb.shape[1], frame_rgb.shape[0], QImage.Format_RGB888)
                 image = self.resize_and_crop_image(image, 256, 256)
 
-                # Save the image and display it
-                image.save(str(save_path), "JPEG")
+                # Save the image and display it (unless the existing image group is opened instead)
+                save_path = self.save_original(image)
+                if save_path is None:
+                    return
+                if self.open_existing_image(save_path):
+                    return
                 self.add_image(save_path)
 
         # Update the visibility of the Next button
@@ -613,6 +633,41 @@ class NewUploadPage(QWidget):
         # Update the visibility of the Upload button
         self.update_upload_button_status()
 
+    def open_existing_image(self, file_path):
+        """
+        Looks for an already processed image that looks like the new one (re-encoded, slightly
+        re-cropped or captured again) and offers to open it instead of processing the new image.
+
+        Parameters:
+            file_path (Path): The path to the new image, after resizing and cropping.
+
+        Returns:
+            bool: True if the user opened the existing image, in which case the new image is deleted.
+        """
+
+        # Look for near-duplicates, preferably in the workspace where all styles are available
+        matches = self.duplicate_index.find(file_path)
+        if not matches:
+            return False
+        workspace_folder = Path("database/workspace")
+        original_path = next((path for _, path in matches if path.parent.parent == workspace_folder), matches[0][1])
+
+        # Ask the user whether to open the existing image
+        reply = QMessageBox.question(self, "Image Already Processed",
+                                     "This image looks like an image you already processed.\n"
+                                     "Do you want to open it instead of processing this image again?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if reply != QMessageBox.Yes:
+            return False
+
+        # Discard the new image (and its image group) and open the editor (workspace) or the gallery
+        shutil.rmtree(file_path.parent, ignore_errors=True)
+        if original_path.parent.parent == workspace_folder:
+            self.go_to_editor.emit(original_path.parent.name)
+        else:
+            self.go_to_gallery.emit()
+        return True
+
     def add_image(self, file_path):
         """
         Adds an image to the grid layout after processing and saving it. The image
@@ -665,7 +720,7 @@ class NewUploadPage(QWidget):
 
     def remove_image(self, img_label, delete_button, file_path):
         """
-        Removes the specified image from the grid layout and deletes it from the local folder.
+        Removes the specified image from the grid layout and deletes its pending image group.
         The grid is reorganized after removal to maintain layout structure.
 
         Parameters:
@@ -674,9 +729,8 @@ class NewUploadPage(QWidget):
             file_path (Path): The file path of the image to be removed.
         """
 
-        # Delete the image file from storage
-        if file_path.exists():
-            file_path.unlink()
+        # Delete the image group of the image from storage
+        shutil.rmtree(file_path.parent, ignore_errors=True)
 
         # Remove the image path from the selected images list
         self.selected_images.remove(file_path)
@@ -814,7 +868,7 @@ class NewUploadPage(QWidget):
     def process_and_save_image(self, file_path):
         """
         Processes an image by resizing and cropping it to 256x256 pixels,
-        then saves it as a .jpg file in the user's upload folder.
+        then saves it as the original of a new workspace image group.
 
         Parameters:
             file_path (Path): The path to the image file to process.
@@ -829,17 +883,31 @@ class NewUploadPage(QWidget):
         # Resize and crop the image to 256x256 pixels
         image = self.resize_and_crop_image(image, 256, 256)
 
-        # Define a unique save path using a timestamp and unique identifier
-        timestamp = int(time.time())
-        unique_id = uuid.uuid4().hex[:6]
-        image_name = f"{Path(file_path).stem}_{timestamp}_{unique_id}.jpg"
-        save_path = self.folder_path / image_name
+        # Save the processed image into its image group
+        return self.save_original(image)
 
-        # Save the processed image as a .jpg
-        image.save(str(save_path), "JPEG")
+    def save_original(self, image):
+        """
+        Allocates a new image group for an uploaded or captured image and saves the image as its
+        original, at its final location. The group stays hidden from the workspace until it is processed.
 
-        # Return the save path if the image file exists, otherwise return None
-        return save_path if save_path.exists() else None
+        Parameters:
+            image (QImage): The resized and cropped image.
+
+        Returns:
+            Path or None: The path to the saved original if successful.
+        """
+
+        group_folder, unique_id = workspace.new_group(pending=True)
+        save_path = group_folder / f"{unique_id}_original.png"
+        temp_path = group_folder / f"{save_path.name}.tmp"
+
+        # Write under a temporary name first, then rename into place
+        if not image.save(str(temp_path), "PNG"):
+            shutil.rmtree(group_folder, ignore_errors=True)
+            return None
+        os.replace(temp_path, save_path)
+        return save_path
 
     def resize_and_crop_image(self, image, target_width, target_height):
         """
@@ -1022,80 +1090,309 @@ class ModelWorker(QObject):
     """
     Worker class for processing images through multiple style transfer models asynchronously.
     This class is used in a separate thread to avoid blocking the main GUI.
+    Each style first runs on a downscaled copy of the images, a preview shown almost immediately
+    that is replaced in place by the full-resolution image once it is done.
+    The images are PNG-encoded and saved in a pool of threads while the styles keep running.
     """
 
-    # Signals for reporting progress and completion status
+    # Resize factor of the previews (128px for the 256px crops, about a quarter of the computation)
+    preview_scale = 0.5
+
+    # Threads encoding the generated images, and their PNG compression level (0-9, OpenCV defaults to 1)
+    encode_threads = 4
+    png_compress_level = 1
+
+    # Signals for reporting progress, saved images and completion status
     progress = pyqtSignal(int)
+    image_ready = pyqtSignal(str, str)
     finished = pyqtSignal(list)
 
-    def __init__(self, selected_images):
+    def __init__(self, selected_images, style_engine, result_cache):
         """
         Initializes the worker with selected images for processing.
 
         Parameters:
             selected_images (list): List of paths to the images selected for style transfer.
+            style_engine (StyleEngine): The app-wide engine holding the style transfer models.
+            result_cache (ResultCache): The app-wide cache of stylized images.
         """
 
         super().__init__()
         self.selected_images = selected_images
+        self.style_engine = style_engine
+        self.result_cache = result_cache
 
     def run(self):
         """
-        Copies selected images into a temporary directory, runs each style transfer model,
-        and emits progress updates. Emits a completion signal with the results when finished.
+        Creates an image group in the workspace for each selected image, runs each style transfer
+        model and saves every generated image into its group as soon as it is done. Emits progress
+        updates, an image_ready signal per saved image and a completion signal with the results.
         """
 
-        # Remove previous datasets folder if it exists
-        parent_path_data = Path("temporary_data/datasets")
-        if parent_path_data.exists():
-            shutil.rmtree(parent_path_data)
+        # Dictionary to store model paths and statuses
+        artists = {get_model_name(style): False for style in STYLES}
+
+        # Decode and normalize the images once, the same tensor is fed to every style
+        images = [Path(image_path) for image_path in self.selected_images]
+        try:
+            batch = self.style_engine.preprocess(images)
+        except Exception:
+            # Report the error for every style, as none of them can run
+            error = traceback.format_exc()
+            print("An error occurred while loading the images:")
+            print(error)
+            self.finished.emit(["error", {artist: error for artist in artists}])
+            return
 
-        # Create the new datasets directory for images to be processed
-        folder_path = Path("temporary_data/datasets/images/testB")
-        folder_path.mkdir(parents=True)
-        # Copy each selected image to the processing folder
-        for image_path in self.selected_images:
-            shutil.copy(image_path, folder_path)
+        # Any later error still finishes the job, reported for the styles that did not succeed
+        try:
+            self.process(images, batch, artists)
+        except Exception:
+            error = traceback.format_exc()
+            print("An error occurred while processing the images:")
+            print(error)
+            for artist, status in artists.items():
+                if status != "database/workspace":
+                    artists[artist] = error
+            self.finished.emit(["error", artists])
+            return
 
-        # Remove temporary uploads folder
-        parent_path_uploads = Path("temporary_data/uploads")
-        if parent_path_uploads.exists():
-            shutil.rmtree(parent_path_uploads)
+        # Emit finished signal with results summary
+        if self.completed_images == len(images) * len(STYLES):
+            self.finished.emit(["success", artists])
+        else:
+            self.finished.emit(["error", artists])
 
-        # Clear out previous results folder
-        parent_path_results = Path("temporary_data/results")
-        if parent_path_results.exists():
-            shutil.rmtree(parent_path_results)
+    def process(self, images, batch, artists):
+        """
+        Creates the image groups, copies the cached results and runs the styles on the other images (see `run`).
 
-        # Dictionary to store model paths and statuses
-        artists = {
-            "style_cezanne_pretrained": False,
-            "style_monet_pretrained": False,
-            "style_ukiyoe_pretrained": False,
-            "style_vangogh_pretrained": False}
-        progress = 0
-
-        # Execute each style transfer model and update progress
-        for artist in artists:
-            # Run the model script
-            execution = run_test_script(artist)
-            # If execution was successful
-            if not execution:
-                # Update dictionary with output path
-                artists[artist] = f"temporary_data/results/{artist}/test_latest/images"
-                progress += 25
-                # Emit progress update
-                self.progress.emit(progress)
-            # If model failed
+        Parameters:
+            images (list[Path]): Paths of the selected images.
+            batch (Tensor or list[Tensor]): The preprocessed images.
+            artists (dict): Status of each style, updated as the styles finish.
+        """
+
+        self.artists = artists
+        self.artists_lock = threading.Lock()
+        self.completed_images = 0
+        self.progress_lock = threading.Lock()
+
+        # Show the image group of each image with its original, the styles are added as they finish.
+        # Uploads already have their group (renamed into the workspace, no file is copied),
+        # the sample images are copied into a new group.
+        self.groups = []
+        for image_path in images:
+            if workspace.is_pending(image_path.parent):
+                group_folder = workspace.publish_group(image_path.parent)
+                unique_id = workspace.get_group_id(group_folder)
             else:
-                # Store error message
-                artists[artist] = execution
+                group_folder, unique_id = workspace.new_group()
+                workspace.copy_file(image_path, group_folder / f"{unique_id}_original.png")
+            self.groups.append((group_folder, unique_id))
+            self.image_ready.emit(unique_id, "original")
+
+        # Copy the results found in the cache into their groups, only the other images are stylized
+        image_hashes = [hash_image(image) for image in batch]
+        self.result_keys, missing_images = {}, {}
+        for style in STYLES:
+            try:
+                model_hash = self.style_engine.get_model_hash(style)
+            except OSError:
+                # Without its checkpoint the style cannot be cached, it reports the error when it runs
+                model_hash = None
+            self.result_keys[style] = [get_result_key(image_hash, model_hash) if model_hash else None
+                                       for image_hash in image_hashes]
+            missing_images[style] = [index for index in range(len(images)) if not self.copy_cached_result(style, index)]
+
+        # Show a low-resolution preview of every missing image first, in one pass over all styles.
+        # Errors are ignored here, the styles report them again below.
+        preview_batch = scale_images(batch, self.preview_scale)
+        self.previews = set()
+        self.encoder = EncodingPool(self.encode_threads)
+        try:
+            if any(missing_images.values()):
+                self.style_engine.stylize(preview_batch, STYLES, on_image=self.on_preview_finished,
+                                          on_style=lambda style, error: None, indices=missing_images)
+            # The previews are on disk before the full-resolution images replace them
+            self.wait_for_encoder()
+
+            # Execute the style transfer models concurrently, results are reported per image and per style
+            self.style_engine.stylize(batch, STYLES, on_image=self.on_image_finished, on_style=self.on_style_finished,
+                                      indices=missing_images)
+            self.wait_for_encoder()
+        finally:
+            self.encoder.close()
+
+    def copy_cached_result(self, style, index):
+        """
+        Copies a cached stylized image into its workspace group, skipping its style transfer.
 
-        # Emit finished signal with results summary
-        if progress == 100:
-            self.finished.emit(["success", artists])
+        Parameters:
+            style (str): The style applied to the image.
+            index (int): The index of the image in the processed images.
+
+        Returns:
+            bool: True if the result was found in the cache, False otherwise.
+        """
+
+        key = self.result_keys[style][index]
+        cached_path = self.result_cache.get(key) if key else None
+        if cached_path is None:
+            return False
+
+        group_folder, unique_id = self.groups[index]
+        try:
+            workspace.copy_file(cached_path, group_folder / f"{unique_id}_{style}.png")
+        except FileNotFoundError:
+            # Evicted in the meantime
+            return False
+        self.report_image(style, unique_id)
+        return True
+
+    def save_image(self, style, index, output):
+        """
+        Saves a generated image into its workspace group, replacing its preview if any.
+        The image is written under a temporary name first, so the GUI never reads a partial file.
+
+        Parameters:
+            style (str): The style applied to the image.
+            index (int): The index of the image in the processed images.
+            output (numpy.ndarray): The generated RGB image.
+
+        Returns:
+            tuple[Path, str]: The path of the saved image and the ID of its group.
+        """
+
+        group_folder, unique_id = self.groups[index]
+        image_path = group_folder / f"{unique_id}_{style}.png"
+        success, data = cv2.imencode(".png", cv2.cvtColor(output, cv2.COLOR_RGB2BGR),
+                                     [cv2.IMWRITE_PNG_COMPRESSION, self.png_compress_level])
+        if not success:
+            raise RuntimeError(f"Could not encode {image_path.name} as PNG")
+        workspace.write_file(image_path, data.tobytes())
+        return image_path, unique_id
+
+    def on_preview_finished(self, style, index, output):
+        """
+        Saves the low-resolution preview of a generated image into its workspace group, in the encoding pool.
+        Called from the engine worker threads.
+
+        Parameters:
+            style (str): The style applied to the image.
+            index (int): The index of the image in the processed images.
+            output (numpy.ndarray): The generated RGB preview.
+        """
+
+        self.previews.add((style, index))
+        self.encoder.submit(self.write_preview, style, index, output)
+
+    def write_preview(self, style, index, output):
+        """
+        Saves and shows a preview (see `on_preview_finished`). Called from the encoding threads.
+        """
+
+        _, unique_id = self.save_image(style, index, output)
+        self.image_ready.emit(unique_id, style)
+
+    def on_image_finished(self, style, index, output):
+        """
+        Saves a generated image into its workspace group and the result cache, in the encoding pool.
+        Called from the engine worker threads; blocks while too many images wait to be encoded.
+
+        Parameters:
+            style (str): The style applied to the image.
+            index (int): The index of the image in the processed images.
+            output (numpy.ndarray): The generated RGB image.
+        """
+
+        # The preview is replaced, it is kept even if the style fails later on
+        self.previews.discard((style, index))
+        self.encoder.submit(self.write_image, style, index, output)
+
+    def write_image(self, style, index, output):
+        """
+        Saves a generated image and reports it (see `on_image_finished`). Called from the encoding threads.
+        An image that fails to save fails its style (the image is reported missing).
+        """
+
+        # Save the generated image next to its original
+        try:
+            image_path, unique_id = self.save_image(style, index, output)
+        except Exception:
+            artist = get_model_name(style)
+            error = traceback.format_exc()
+            with self.artists_lock:
+                self.artists[artist] = error
+            print(f"An error occurred while saving an image of {artist}:")
+            print(error)
+            return
+
+        # Keep a copy for the next time the same image is processed
+        key = self.result_keys[style][index]
+        if key and image_path.exists():
+            self.result_cache.put(key, image_path)
+        self.report_image(style, unique_id)
+
+    def wait_for_encoder(self):
+        """
+        Waits until all submitted images are saved. An image that failed to save is reported
+        missing (the job finishes with an error).
+        """
+
+        try:
+            self.encoder.wait()
+        except Exception:
+            print("An error occurred while saving a generated image:")
+            print(traceback.format_exc())
+
+    def report_image(self, style, unique_id):
+        """
+        Emits a saved image together with a progress update.
+
+        Parameters:
+            style (str): The style applied to the image.
+            unique_id (str): The ID of the image group the image was saved in.
+        """
+
+        self.image_ready.emit(unique_id, style)
+
+        # Emit progress update over all images of all styles
+        with self.progress_lock:
+            self.completed_images += 1
+            self.progress.emit(int(100 * self.completed_images / (len(self.groups) * len(STYLES))))
+
+    def on_style_finished(self, style, error):
+        """
+        Stores the status of a style once all its images are done. Called from the engine.
+
+        Parameters:
+            style (str): The finished style.
+            error (str or None): The error message if the style failed, None otherwise.
+        """
+
+        artist = get_model_name(style)
+        # If execution was successful
+        if error is None:
+            # Update dictionary with output path, unless one of its images already failed to save
+            with self.artists_lock:
+                if self.artists[artist] is False:
+                    self.artists[artist] = "database/workspace"
+        # If model failed
         else:
-            self.finished.emit(["error", artists])
+            # Store error message
+            with self.artists_lock:
+                self.artists[artist] = error
+            print(f"An error occurred while applying {artist}:")
+            print(error)
+
+            # Remove the previews that were not replaced, the workspace shows the image as not available
+            for preview_style, index in list(self.previews):
+                if preview_style == style:
+                    self.previews.discard((style, index))
+                    group_folder, unique_id = self.groups[index]
+                    (group_folder / f"{unique_id}_{style}.png").unlink(missing_ok=True)
+                    self.image_ready.emit(unique_id, style)
 
 
 class ProgressBarPage(QWidget):
@@ -1108,20 +1405,26 @@ class ProgressBarPage(QWidget):
     go_to_main = pyqtSignal()
     go_to_workspace = pyqtSignal()
 
-    def __init__(self, selected_images, my_sizing):
+    def __init__(self, selected_images, my_sizing, style_engine, result_cache):
         """
         Initializes the progress bar page with the list of selected images and screen size.
 
         Parameters:
             selected_images (list[Path]): List of paths to the selected images.
             my_sizing (tuple[int, int]): Screen width and height for sizing the overlay.
+            style_engine (StyleEngine): The app-wide engine holding the style transfer models.
+            result_cache (ResultCache): The app-wide cache of stylized images.
         """
 
         super().__init__()
         self.selected_images = selected_images
+        self.style_engine = style_engine
+        self.result_cache = result_cache
+        # Set once the first generated image is shown in the workspace
+        self.results_shown = False
         self.initUI()
         self.show_loading_overlay(my_sizing)
-        self.start_model_processing()
+        self.setup_model_worker()
 
     def initUI(self):
         """
@@ -1172,22 +1475,34 @@ class ProgressBarPage(QWidget):
         # Display overlay
         self.overlay.show()
 
-    def start_model_processing(self):
+    def setup_model_worker(self):
         """
-        Initiates model processing in a separate thread to avoid blocking the main UI thread.
+        Sets up model processing in a separate thread to avoid blocking the main UI thread.
+        The processing starts with `start_model_processing`, once all worker signals are connected.
         """
 
         # Set up background thread and ModelWorker instance
         self.thread = QThread()
-        self.worker = ModelWorker(self.selected_images)
+        self.worker = ModelWorker(self.selected_images, self.style_engine, self.result_cache)
         self.worker.moveToThread(self.thread)
 
-        # Connect worker signals for progress and completion
+        # Connect worker signals for progress, saved images and completion
         self.worker.progress.connect(self.update_progress)
+        self.worker.image_ready.connect(self.on_image_ready)
         self.worker.finished.connect(self.on_processing_finished)
 
-        # Start processing in the background
+        # The processing continues in the workspace after this page is closed, so the thread stops itself.
+        # The main window keeps the thread and the worker until the thread is done (see ArtStudioApp.release_job).
+        self.worker.finished.connect(self.thread.quit)
+
+        # Run the worker when the thread starts
         self.thread.started.connect(self.worker.run)
+
+    def start_model_processing(self):
+        """
+        Starts model processing in the background thread.
+        """
+
         self.thread.start()
 
     def update_progress(self, value):
@@ -1200,6 +1515,21 @@ class ProgressBarPage(QWidget):
 
         self.progress_bar.setValue(value)
 
+    def on_image_ready(self, unique_id, style):
+        """
+        Continues to the workspace as soon as the first generated image is saved there,
+        the remaining images appear in the workspace while they are processed.
+
+        Parameters:
+            unique_id (str): The ID of the image group the image was saved in.
+            style (str): The style of the saved image ("original" for the uploaded image).
+        """
+
+        if style != "original" and not self.results_shown:
+            self.results_shown = True
+            self.overlay.hide()
+            self.go_to_workspace.emit()
+
     def on_processing_finished(self, results):
         """
         Handles completion of processing, hides the overlay, and navigates based on results.
@@ -1208,19 +1538,17 @@ class ProgressBarPage(QWidget):
             results (list): Processing results, including success status and processed image paths.
         """
 
+        # Nothing to do if the workspace already shows the results (the app reports later errors)
+        if self.results_shown:
+            return
+
         # Hide the overlay
         self.overlay.hide()
 
-        # Stop and clean up the processing thread
-        self.thread.quit()
-        self.thread.wait()
-        self.thread.deleteLater()
-
         # If processing was sucessful
         if results[0] == "success":
-            # Move results
-            self.process_and_move_images()
             # Continue to workspace
+            self.results_shown = True
             self.go_to_workspace.emit()
         # If processing was not successful
         else:
@@ -1261,45 +1589,3 @@ class ProgressBarPage(QWidget):
 
             # Show the error popup
             error_popup.exec_()
-
-    def process_and_move_images(self):
-        """
-        Organizes processed images by moving them into a dedicated user directory
-        with each image group in its own subfolder.
-        """
-
-        # New image folders and paths
-        temp_image_folder = Path("temporary_data/datasets/images/testB")
-        style_folders = [Path(f"temporary_data/results/style_{style}_pretrained/test_latest/images")
-                                    for style in ["cezanne", "monet", "ukiyoe", "vangogh"]]
-        user_folder = Path("database/workspace")
-
-        # For each original image, create a unique folder and move all versions
-        for original_image in temp_image_folder.glob("*.jpg"):
-
-            # Generate a unique ID for this image group
-            unique_id = f"{int(time.time_ns())}_{uuid.uuid4().hex[:6]}"
-            group_folder = user_folder / unique_id
-            group_folder.mkdir()
-
-            # Move the original image
-            new_original_path = group_folder / f"{unique_id}_original.png"
-            shutil.move(str(original_image), str(new_original_path))
-
-            # Move each styled version of the image
-            original_name = original_image.stem
-            for style_folder in style_folders:
-                style_image = style_folder / f"{original_name}_fake.png"
-                style_name = style_folder.parts[-3].split('_')[1]
-                new_style_path = group_folder / f"{unique_id}_{style_name}.png"
-                shutil.move(str(style_image), str(new_style_path))
-
-        # Delete datasets folder after processing
-        parent_path_data = Path("temporary_data/datasets")
-        if parent_path_data.exists():
-            shutil.rmtree(parent_path_data)
-
-        # Delete results folder after processing
-        parent_path_results = Path("temporary_data/results")
-        if parent_path_results.exists():
-            shutil.rmtree(parent_path_results)
@@ -24,6 +24,9 @@ import numpy as np
 # Import toolbar
 from ui.toolbar_helper import setup_toolbar
 
+# Import workspace image groups
+from utils import workspace
+
 
 class WorkspacePage(QWidget):
     """
@@ -40,13 +43,17 @@ class WorkspacePage(QWidget):
     # Signal to go to the editor page
     go_to_editor = pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, processing=False):
         """
         Initializes the workspace page layout including the toolbar and all
         original and styled images for the user to select one image to edit.
+
+        Parameters:
+            processing (bool): Whether a processing job is still adding images to the workspace.
         """
 
         super().__init__()
+        self.processing = processing
         self.initUI()
 
     def initUI(self):
@@ -104,6 +111,9 @@ class WorkspacePage(QWidget):
         # Set thumbnail size
         self.image_size = 400
 
+        # Image labels by (image group, style), updated when a processed image is added to a displayed group
+        self.image_labels = {}
+
         #####################################################################
         #                                                                                                                                      #
         # Content Layout                                                                                                            #
@@ -111,7 +121,7 @@ class WorkspacePage(QWidget):
         #####################################################################
 
         # Load images (newest image folders first)
-        image_groups = sorted(Path("database/workspace").glob("*"), key=lambda x: x.name, reverse=True)
+        image_groups = workspace.list_groups()
         # If there are images in the workspace folder
         if image_groups:
             # Populate the grid layout
@@ -169,14 +179,8 @@ class WorkspacePage(QWidget):
 
             # Set up the image label to display the styled image
             image_label = QLabel()
-            # Original image
-            if style == "original":
-                image_size = self.image_size
-            # Styled images are displayed smaller
-            else:
-                image_size = int(self.image_size * 3 / 4)
-            pixmap = QPixmap(str(image_path)).scaled(image_size, image_size, Qt.KeepAspectRatio)
-            image_label.setPixmap(pixmap)
+            self.image_labels[(image_name, style)] = image_label
+            self.show_image(image_label, image_path, style)
             # Add to layout
             container_layout.addWidget(image_label, 0, 0, Qt.AlignCenter)
 
@@ -197,6 +201,70 @@ class WorkspacePage(QWidget):
             # Add to page
             main_layout.addWidget(container, row, col, Qt.AlignCenter)
 
+    def show_image(self, image_label, image_path, style):
+        """
+        Displays an image in its label, or a placeholder if the image is not processed yet.
+
+        Parameters:
+            image_label (QLabel): The label displaying the image.
+            image_path (Path): Path to the image file.
+            style (str): The style of the image ("original" for the uploaded image).
+        """
+
+        # Original image
+        if style == "original":
+            image_size = self.image_size
+        # Styled images are displayed smaller
+        else:
+            image_size = int(self.image_size * 3 / 4)
+
+        # Styles of a group that is still processed (or whose style failed) are not saved yet
+        if not image_path.exists():
+            image_label.setFixedSize(image_size, image_size)
+            image_label.setAlignment(Qt.AlignCenter)
+            image_label.setFont(QFont("Arial", 12))
+            image_label.setStyleSheet("color: #555555; background-color: #e3e8ef;")
+            image_label.setText("Processing..." if self.processing else "Not available")
+            return
+
+        # Display the image
+        pixmap = QPixmap(str(image_path)).scaled(image_size, image_size, Qt.KeepAspectRatio)
+        image_label.setStyleSheet("")
+        image_label.setPixmap(pixmap)
+
+    def update_image(self, image_name, style):
+        """
+        Displays an image that was added to the workspace while the page is shown.
+
+        Parameters:
+            image_name (str): The ID of the image group.
+            style (str): The style of the added image.
+        """
+
+        image_path = Path("database/workspace") / image_name / f"{image_name}_{style}.png"
+
+        # New image groups are added by reloading the page (deleted groups are ignored)
+        if (image_name, style) not in self.image_labels:
+            if image_path.exists():
+                self.refresh_page()
+            return
+
+        self.show_image(self.image_labels[(image_name, style)], image_path, style)
+
+    def set_processing(self, processing):
+        """
+        Updates the placeholders of the missing images once the processing job is done.
+
+        Parameters:
+            processing (bool): Whether a processing job is still adding images to the workspace.
+        """
+
+        self.processing = processing
+        for (image_name, style), image_label in self.image_labels.items():
+            image_path = Path("database/workspace") / image_name / f"{image_name}_{style}.png"
+            if not image_path.exists():
+                self.show_image(image_label, image_path, style)
+
     def confirm_delete(self, folder_path):
         """
         Prompts the user for confirmation to delete an image group folder. Deletes
@@ -426,7 +494,10 @@ class EditorPage(QWidget):
 
         # Style selection dropwdown
         self.style_dropdown = QComboBox()
-        self.style_dropdown.addItems([style.capitalize() for style in ["original", "cezanne", "monet", "ukiyoe", "vangogh"]])
+        # Only the styles already processed can be edited
+        styles = [style for style in ["original", "cezanne", "monet", "ukiyoe", "vangogh"]
+                  if Path(f"database/workspace/{self.selected_image}/{self.selected_image}_{style}.png").exists()]
+        self.style_dropdown.addItems([style.capitalize() for style in styles])
         self.style_dropdown.setStyleSheet("padding: 5px;")
         self.style_dropdown.currentIndexChanged.connect(self.update_image_display)
         # Add to layout
@@ -0,0 +1,308 @@
+"""
+This module picks the fastest inference configuration of the style generators for
+the machine the app runs on: the execution backend, the number of styles run
+concurrently (each with its share of the cores as intra-op threads) and the
+number of images per forward pass.
+
+On first run, the tuner microbenchmarks the forward pass of a ResnetGenerator
+with the architecture of the pretrained styles (randomly initialized, as the
+speed does not depend on the weights). It searches one setting at a time:
+    -- the backend, with all cores in one worker;
+    -- the number of concurrent workers, with the fastest backend;
+    -- the batch size, with the fastest backend and number of workers.
+Only backends producing the same images as the fp32 generator (up to float
+rounding) are candidates: quantization and bfloat16 change the outputs, so
+they stay an explicit choice and every machine produces the same images.
+
+The winning configuration is saved in a JSON file under a fingerprint of the
+machine (CPU, cores, memory, torch and onnxruntime versions), so a machine whose
+hardware or libraries changed is tuned again on its next start.
+"""
+
+# Import libraries
+import os
+import copy
+import json
+import time
+import hashlib
+import platform
+import tempfile
+import threading
+import importlib.util
+from pathlib import Path
+
+# Import the core splitting and pinning of the engine (also makes the CycleGAN packages importable)
+from utils.style_engine import BASE_DIR, STYLES, split_cores, use_cores
+
+# Command-line options of the CycleGAN test model selecting each backend
+BACKEND_ARGS = {
+    "eager": [],
+    "channels_last": ["--channels_last"],
+    "jit": ["--jit"],
+    "onnxruntime": ["--backend", "onnxruntime"],
+}
+
+# Test options choosing the backend, a caller passing any of them keeps its own choice
+BACKEND_OPTIONS = {"--backend", "--channels_last", "--bf16", "--jit", "--quantize"}
+
+# Serializes tuning between the threads of the app
+tuning_lock = threading.Lock()
+
+
+def get_machine_fingerprint():
+    """
+    Describes the hardware and the libraries the inference speed depends on.
+
+    Returns:
+        tuple[str, dict]: The SHA-256 hex digest of the description, and the description.
+    """
+
+    # Import torch and the bfloat16 detection of CycleGAN
+    import torch
+    from models import bf16
+
+    processor = platform.processor() or platform.machine()
+    try:  # Linux: the model name is more precise than the architecture
+        with open("/proc/cpuinfo") as f:
+            processor = next(line.split(":", 1)[1].strip() for line in f if line.startswith("model name"))
+    except (OSError, StopIteration):
+        pass
+    try:
+        memory = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        memory = None
+    onnxruntime_version = None
+    if importlib.util.find_spec("onnxruntime") is not None and importlib.util.find_spec("onnx") is not None:
+        import onnxruntime
+        onnxruntime_version = onnxruntime.__version__
+
+    machine = {
+        "system": platform.system(),
+        "architecture": platform.machine(),
+        "processor": processor,
+        "cores": len(split_cores(os.cpu_count() or 1)),
+        "memory": memory,
+        "bf16": bf16.cpu_supports_bf16(),
+        "torch": torch.__version__,
+        "onnxruntime": onnxruntime_version,
+    }
+    return hashlib.sha256(json.dumps(machine, sort_keys=True).encode()).hexdigest(), machine
+
+
+def build_backends(net, example_input, folder):
+    """
+    Converts a generator to every backend available on this machine.
+
+    Parameters:
+        net (nn.Module): The fp32 generator.
+        example_input (Tensor): An input of the benchmarked shape, used for tracing and exporting.
+        folder (str): A temporary folder for the exported ONNX model.
+
+    Returns:
+        dict: Maps each backend name to a function returning (callable generator, input) for the
+              calling thread, called once the intra-op thread count of the thread is set.
+    """
+
+    # Import torch and CycleGAN helpers
+    import torch
+    from models import networks, onnx_backend
+
+    backends = {"eager": lambda: (net, example_input)}
+
+    net_cl = networks.to_channels_last(copy.deepcopy(net))
+    input_cl = example_input.to(memory_format=torch.channels_last)
+    backends["channels_last"] = lambda: (net_cl, input_cl)
+
+    with torch.no_grad():
+        frozen = torch.jit.optimize_for_inference(torch.jit.freeze(torch.jit.trace(net, example_input).eval()))
+    backends["jit"] = lambda: (frozen, example_input)
+
+    if importlib.util.find_spec("onnx") is not None and importlib.util.find_spec("onnxruntime") is not None:
+        path = os.path.join(folder, "autotune.onnx")
+        onnx_backend.export_session(net, path, "autotune", example_input)
+        # Each worker has its own session, as a session keeps the thread count it was created with
+        backends["onnxruntime"] = lambda: (onnx_backend.OnnxGenerator(path), example_input)
+    return backends
+
+
+def measure(build, workers, batch_size, iterations=2):
+    """
+    Measures the throughput of concurrent workers, run as the engine runs styles: every worker
+    thread is pinned to its own set of cores and uses them as intra-op threads.
+
+    Parameters:
+        build (callable): Returns (callable generator, input) for the calling thread (see `build_backends`).
+        workers (int): Number of concurrent workers.
+        batch_size (int): Number of images per forward pass.
+        iterations (int): Timed forward passes per worker, after one warm-up pass.
+
+    Returns:
+        float: The number of images per second of all workers together.
+    """
+
+    # Import torch
+    import torch
+
+    core_sets = split_cores(workers)
+    barrier = threading.Barrier(len(core_sets) + 1)
+    errors = []
+
+    def run(cores):
+        try:
+            # The same thread setup as the styles of the engine
+            use_cores(cores)
+            net, example_input = build()
+            # Concatenation keeps the memory format of the input
+            batch = torch.cat([example_input] * batch_size)
+            with torch.no_grad():
+                net(batch)
+                barrier.wait()
+                for _ in range(iterations):
+                    net(batch)
+        except Exception as e:
+            errors.append(e)
+            barrier.abort()
+
+    threads = [threading.Thread(target=run, args=(cores,), daemon=True) for cores in core_sets]
+    for thread in threads:
+        thread.start()
+    try:
+        # Time from the moment all workers are warmed up
+        barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return len(core_sets) * batch_size * iterations / (time.perf_counter() - start)
+
+
+def tune(image_size=256, batch_sizes=(1, 2, 4), netG="resnet_9blocks", ngf=64):
+    """
+    Microbenchmarks the generator forward pass and picks the fastest configuration.
+
+    Parameters:
+        image_size (int): Side of the benchmarked images, the size of the crops the app runs.
+        batch_sizes (tuple): Candidate numbers of images per forward pass.
+        netG (str): Generator architecture of the styles.
+        ngf (int): Number of generator filters of the styles.
+
+    Returns:
+        dict: The configuration: backend, workers (concurrent styles), intra-op and inter-op thread counts,
+              batch size, and the measured images per second of every tried candidate.
+    """
+
+    # Import torch and CycleGAN networks
+    import torch
+    from models import networks
+
+    net = networks.define_G(3, 3, ngf, netG, "instance", False, "normal", 0.02, []).eval()
+    example_input = torch.rand(1, 3, image_size, image_size) * 2 - 1
+    cores = len(split_cores(os.cpu_count() or 1))
+    worker_candidates = sorted({workers for workers in (1, 2, 4, len(STYLES)) if workers <= min(cores, len(STYLES))})
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        backends = build_backends(net, example_input, folder)
+
+        def try_candidate(backend, workers, batch_size):
+            try:
+                speed = measure(backends[backend], workers, batch_size)
+            except Exception as e:
+                # A backend failing on this machine is never picked
+                print(f"Autotune: {backend} failed: {e}")
+                speed = 0.0
+            results.append({"backend": backend, "workers": workers, "batch_size": batch_size, "images_per_sec": speed})
+            return speed
+
+        backend = max(backends, key=lambda name: try_candidate(name, 1, 1))
+        workers = max(worker_candidates, key=lambda count: try_candidate(backend, count, 1))
+        batch_size = max(batch_sizes, key=lambda size: try_candidate(backend, workers, size))
+
+    return {
+        "backend": backend,
+        "workers": workers,
+        "intra_op_threads": len(split_cores(workers)[0]),
+        "interop_threads": workers,
+        "batch_size": batch_size,
+        "results": results,
+    }
+
+
+def get_tuned_config(path=BASE_DIR / "database" / "autotune.json", retune=False):
+    """
+    Returns the configuration tuned for this machine, tuning it first if the machine (or its
+    torch or onnxruntime version) has not been tuned yet.
+
+    Parameters:
+        path (Path): The JSON file holding the configurations by machine fingerprint.
+        retune (bool): Whether to tune again even if a configuration is saved.
+
+    Returns:
+        dict: The configuration (see `tune`).
+    """
+
+    path = Path(path)
+    with tuning_lock:
+        fingerprint, machine = get_machine_fingerprint()
+        try:
+            configs = json.loads(path.read_text())
+        except (OSError, ValueError):
+            configs = {}
+        if retune or fingerprint not in configs:
+            print("Autotune: benchmarking the inference configurations of this machine...")
+            configs[fingerprint] = dict(tune(), machine=machine)
+            print(f"Autotune: using {get_config_summary(configs[fingerprint])}")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(configs, indent=2))
+            os.replace(temp_path, path)
+        return configs[fingerprint]
+
+
+def get_config_summary(config):
+    """
+    Returns a one-line description of a configuration.
+    """
+
+    return (f"backend {config['backend']}, {config['workers']} concurrent style(s) with "
+            f"{config['intra_op_threads']} thread(s) each, batch size {config['batch_size']}")
+
+
+def get_backend_args(config, extra_args=()):
+    """
+    Returns the CycleGAN test options selecting the tuned backend.
+
+    Parameters:
+        config (dict): The tuned configuration.
+        extra_args (list): The options given by the caller; if they already choose a backend, no option is added.
+
+    Returns:
+        list: The options to add to the test options.
+    """
+
+    if any(arg in BACKEND_OPTIONS for arg in extra_args):
+        return []
+    return list(BACKEND_ARGS.get(config["backend"], []))
+
+
+def apply_interop_threads(config):
+    """
+    Sets the torch inter-op thread count of the configuration. It can only be set before any
+    inter-op work has started in the process; it is left as is otherwise.
+    """
+
+    # Import torch
+    import torch
+
+    try:
+        torch.set_num_interop_threads(config["interop_threads"])
+    except RuntimeError:
+        pass
+
+
+if __name__ == "__main__":
+    # Tune again, e.g. after closing other applications: python -m utils.autotune
+    get_tuned_config(retune=True)
@@ -0,0 +1,251 @@
+"""
+This module provides a perceptual-hash index of the original images stored in
+the workspace and the gallery, to recognize an upload that was already processed
+even if it was re-encoded, slightly re-cropped or captured again with the camera.
+
+Each original is summarized by its difference hash (dHash): the image is reduced
+to a 9x8 grayscale thumbnail and every bit of the 64-bit hash tells whether a
+pixel is brighter than its right neighbour. Similar images have hashes that
+differ in few bits, so near-duplicates are found by searching the hashes within
+a small Hamming distance with multi-index hashing, which only checks the hashes
+sharing an (almost) identical 16-bit chunk with the searched one.
+
+The hashes are stored in a JSON file together with the modification time of
+each image, so only new or changed images are hashed when the index is loaded.
+The app refreshes the index in a background thread, searches use the previous
+lookup tables until the refresh is done.
+"""
+
+# Import libraries
+import json
+import threading
+import traceback
+from pathlib import Path
+from PIL import Image
+
+
+def dhash(image_path, hash_size=8):
+    """
+    Computes the difference hash of an image.
+
+    Parameters:
+        image_path (Path): Path to the image file.
+        hash_size (int): Number of rows (and of compared pixel pairs per row) of the hash.
+
+    Returns:
+        int: The hash, with hash_size * hash_size bits.
+    """
+
+    # Reduce the image to a small grayscale thumbnail, one column wider than the hash
+    with Image.open(image_path) as image:
+        thumbnail = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(thumbnail.getdata())
+
+    # One bit per pair of horizontally adjacent pixels
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming_distance(hash_a, hash_b):
+    """
+    Returns the number of bits that differ between two hashes.
+    """
+
+    return bin(hash_a ^ hash_b).count("1")
+
+
+class MultiIndexHash:
+    """
+    Multi-index hashing of 64-bit hashes for searches within a Hamming distance.
+    The hashes are split into 4 chunks of 16 bits, each with its own lookup table.
+    If two hashes differ in at most max_distance bits, at least one of their chunks
+    differs in at most max_distance // 4 bits, so a search only has to look up the
+    chunk values close to the ones of the searched hash and check their hashes.
+    """
+
+    def __init__(self, num_chunks=4, chunk_bits=16):
+        """
+        Initializes an empty index.
+
+        Parameters:
+            num_chunks (int): Number of chunks the hashes are split into.
+            chunk_bits (int): Number of bits of each chunk.
+        """
+
+        self.num_chunks = num_chunks
+        self.chunk_bits = chunk_bits
+        self.chunk_mask = (1 << chunk_bits) - 1
+        # One table per chunk: chunk value -> list of (hash, item)
+        self.tables = [{} for _ in range(num_chunks)]
+        # Bit flips within a distance of each chunk value, by distance
+        self.flips = {0: [0]}
+
+    def get_chunks(self, value):
+        """
+        Returns the chunk values of a hash.
+        """
+
+        return [(value >> (chunk * self.chunk_bits)) & self.chunk_mask for chunk in range(self.num_chunks)]
+
+    def get_flips(self, max_distance):
+        """
+        Returns all chunk-sized masks with at most max_distance bits set.
+        """
+
+        if max_distance not in self.flips:
+            self.flips[max_distance] = [mask for mask in range(1 << self.chunk_bits)
+                                        if bin(mask).count("1") <= max_distance]
+        return self.flips[max_distance]
+
+    def add(self, value, item):
+        """
+        Adds an item with the given hash.
+
+        Parameters:
+            value (int): The hash of the item.
+            item: The item returned by searches (e.g. the image path).
+        """
+
+        for table, chunk_value in zip(self.tables, self.get_chunks(value)):
+            table.setdefault(chunk_value, []).append((value, item))
+
+    def search(self, value, max_distance):
+        """
+        Finds the items whose hash is within max_distance of the given hash.
+
+        Parameters:
+            value (int): The hash to search for.
+            max_distance (int): The maximum Hamming distance.
+
+        Returns:
+            list[tuple[int, object]]: The (distance, item) pairs, closest first.
+        """
+
+        # Candidates: entries sharing a chunk within max_distance // num_chunks bits
+        flips = self.get_flips(max_distance // self.num_chunks)
+        matches, checked = [], set()
+        for table, chunk_value in zip(self.tables, self.get_chunks(value)):
+            for flip in flips:
+                for candidate, item in table.get(chunk_value ^ flip, ()):
+                    if id(item) in checked:
+                        continue
+                    checked.add(id(item))
+                    distance = hamming_distance(value, candidate)
+                    if distance <= max_distance:
+                        matches.append((distance, item))
+        return sorted(matches, key=lambda match: match[0])
+
+
+class DuplicateIndex:
+    """
+    Perceptual-hash index of the original images of the workspace and the gallery.
+    """
+
+    def __init__(self, folders=(Path("database/workspace"), Path("database/gallery")),
+                 index_path=Path("database/hash_index.json"), max_distance=10):
+        """
+        Initializes the index without reading any image (see `refresh`).
+
+        Parameters:
+            folders (tuple[Path]): The folders holding one image group per subfolder.
+            index_path (Path): The JSON file storing the computed hashes.
+            max_distance (int): The maximum Hamming distance between the hashes of near-duplicates.
+        """
+
+        self.folders = [Path(folder) for folder in folders]
+        self.index_path = Path(index_path)
+        self.max_distance = max_distance
+        self.hashes = {}
+        self.lookup = MultiIndexHash()
+        # Serializes the refreshes, each one reads and writes the JSON file
+        self.refresh_lock = threading.Lock()
+
+    def refresh_in_background(self):
+        """
+        Starts `refresh` in a background thread, so that hashing and listing the stored
+        originals does not block the GUI. Searches use the current lookup tables meanwhile.
+        """
+
+        threading.Thread(target=self.refresh_and_report, daemon=True).start()
+
+    def refresh_and_report(self):
+        """
+        Runs `refresh`, printing its error if it fails (the previous lookup tables are kept).
+        """
+
+        try:
+            self.refresh()
+        except Exception:
+            print("An error occurred while updating the duplicate index:")
+            print(traceback.format_exc())
+
+    def refresh(self):
+        """
+        Updates the index with the originals currently stored: hashes new or modified
+        images, forgets deleted ones, rebuilds the lookup tables and saves the hashes.
+        """
+
+        with self.refresh_lock:
+            self.update()
+
+    def update(self):
+        """
+        Performs `refresh`, called with the refresh lock held.
+        """
+
+        # Hashes computed before, with the modification time of their image
+        stored = {}
+        if self.index_path.exists():
+            try:
+                stored = json.loads(self.index_path.read_text())
+            except ValueError:
+                stored = {}
+
+        hashes = {}
+        for folder in self.folders:
+            for image_path in folder.glob("*/*_original.png"):
+                # Uploads not processed yet are in hidden group folders (see workspace.py)
+                if image_path.parent.name.startswith("."):
+                    continue
+                key = image_path.as_posix()
+                try:
+                    mtime = image_path.stat().st_mtime
+                    if key in stored and stored[key]["mtime"] == mtime:
+                        hashes[key] = stored[key]
+                    else:
+                        hashes[key] = {"hash": dhash(image_path), "mtime": mtime}
+                except OSError:
+                    # Deleted or unreadable image
+                    continue
+
+        # Rebuild the lookup tables, then replace the ones searched by `find`
+        lookup = MultiIndexHash()
+        for key, entry in hashes.items():
+            lookup.add(entry["hash"], Path(key))
+        self.hashes, self.lookup = hashes, lookup
+
+        # Save the hashes for the next start
+        if hashes != stored:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            self.index_path.write_text(json.dumps(hashes))
+
+    def find(self, image_path, max_distance=None):
+        """
+        Finds the stored originals that look like the given image.
+
+        Parameters:
+            image_path (Path): The image to look up.
+            max_distance (int or None): The maximum Hamming distance; the index default if None.
+
+        Returns:
+            list[tuple[int, Path]]: The (distance, original path) pairs, closest first.
+        """
+
+        if max_distance is None:
+            max_distance = self.max_distance
+        return self.lookup.search(dhash(image_path), max_distance)
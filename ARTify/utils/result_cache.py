@@ -0,0 +1,141 @@
+"""
+This module provides a persistent cache of stylized images. A result is stored
+as a PNG file named after its key, a hash of the preprocessed input pixels, of
+the style checkpoint and of the options the style ran with, so the same input
+is never stylized twice with the same model.
+
+The cache is bounded in size: once it grows over its limit, the least recently
+used results are deleted (a cache hit refreshes the modification time of the
+file, which serves as the access time). The folder is only listed once, when
+the cache is created; the sizes and the order of use are then kept in memory.
+"""
+
+# Import libraries
+import os
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+# Define the base directory for the project (two levels up from this script's location)
+BASE_DIR = Path(__file__).parent.parent
+
+
+def hash_image(image):
+    """
+    Returns the hash of an image tensor, computed over its pixel values.
+
+    Parameters:
+        image (Tensor): A preprocessed CxHxW (or 1xCxHxW) image.
+
+    Returns:
+        str: The SHA-256 hex digest of the pixels and the image shape.
+    """
+
+    # The same image hashes the same whether it comes from a stacked batch (CxHxW) or a list (1xCxHxW)
+    image = image.reshape(-1, *image.shape[-3:])[0]
+    sha = hashlib.sha256(str(tuple(image.shape)).encode())
+    sha.update(image.contiguous().numpy().tobytes())
+    return sha.hexdigest()
+
+
+def get_result_key(image_hash, model_hash):
+    """
+    Returns the cache key of a stylized image.
+
+    Parameters:
+        image_hash (str): The hash of the preprocessed input image (see `hash_image`).
+        model_hash (str): The hash of the style checkpoint and of the options it runs with.
+
+    Returns:
+        str: The key, usable as a file name.
+    """
+
+    return hashlib.sha256(f"{image_hash}:{model_hash}".encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of stylized images on disk. Safe to use from several threads.
+    """
+
+    def __init__(self, folder=BASE_DIR / "database" / "cache", max_size=512 * 2 ** 20):
+        """
+        Initializes the cache in the given folder, keeping the results already stored there.
+
+        Parameters:
+            folder (Path): The folder holding the cached PNG files.
+            max_size (int): The maximum total size of the cached files in bytes.
+        """
+
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.lock = threading.Lock()
+
+        # Sizes of the cached files by key, least recently used first, and their total
+        stored = []
+        for path in self.folder.glob("*.png"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            stored.append((stat.st_mtime, path.stem, stat.st_size))
+        self.sizes = OrderedDict((key, size) for _, key, size in sorted(stored))
+        self.total_size = sum(self.sizes.values())
+
+    def get(self, key):
+        """
+        Looks up a result and marks it as recently used.
+
+        Parameters:
+            key (str): The key of the result (see `get_result_key`).
+
+        Returns:
+            Path or None: The path of the cached PNG file, or None on a cache miss.
+        """
+
+        path = self.folder / f"{key}.png"
+        with self.lock:
+            if key not in self.sizes:
+                return None
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # Deleted from outside the app
+                self.total_size -= self.sizes.pop(key)
+                return None
+            self.sizes.move_to_end(key)
+        return path
+
+    def put(self, key, image_path):
+        """
+        Stores a copy of a result and evicts the least recently used results if the cache is full.
+
+        Parameters:
+            key (str): The key of the result (see `get_result_key`).
+            image_path (Path): The PNG file of the result.
+        """
+
+        path = self.folder / f"{key}.png"
+        temp_path = self.folder / f"{key}.{threading.get_ident()}.tmp"
+        # Copy under a temporary name first, so a partially written file is never found by `get`
+        shutil.copyfile(image_path, temp_path)
+        size = temp_path.stat().st_size
+        with self.lock:
+            os.replace(temp_path, path)
+            self.total_size += size - self.sizes.pop(key, 0)
+            self.sizes[key] = size
+            self.evict()
+
+    def evict(self):
+        """
+        Deletes the least recently used results until the cache fits in its maximum size.
+        Called with the lock held.
+        """
+
+        while self.total_size > self.max_size and self.sizes:
+            key, size = self.sizes.popitem(last=False)
+            (self.folder / f"{key}.png").unlink(missing_ok=True)
+            self.total_size -= size
@@ -0,0 +1,722 @@
+"""
+This module provides a long-lived style transfer engine for the CycleGAN models.
+Instead of starting a new Python interpreter running `test.py` for every style
+(see run_cycleGAN.py), the engine builds the generators of all styles once and
+keeps them in memory, so that following jobs only pay for the forward passes.
+
+The styles run concurrently, either in threads of the calling process or in a
+pool of worker processes. Worker processes load the generators from the
+memory-mapped weight files of the checkpoints (see models/fast_load.py), so
+they all read the same pages of the page cache instead of holding their own
+copy of the weights, and the resident memory stays flat as workers are added.
+
+For more information on CycleGAN, visit:
+https://github.com/junyanz/pytorch-CycleGAN-and-pix2pix
+
+The pretrained checkpoints and the example images are downloaded from:
+https://efrosgans.eecs.berkeley.edu/cyclegan/
+"""
+
+# Import libraries
+import os
+import sys
+import queue
+import hashlib
+import threading
+import traceback
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Define the base directory for the project (two levels up from this script's location)
+BASE_DIR = Path(__file__).parent.parent
+
+# The CycleGAN packages (options, models, data, util) are imported as top-level packages
+CYCLEGAN_DIR = BASE_DIR / "CycleGAN"
+if str(CYCLEGAN_DIR) not in sys.path:
+    sys.path.insert(0, str(CYCLEGAN_DIR))
+
+# Styles available in the checkpoints directory
+STYLES = ["cezanne", "monet", "ukiyoe", "vangogh"]
+
+
+def get_model_name(style):
+    """
+    Returns the checkpoint folder name of a style.
+
+    Parameters:
+        style (str): The style name (e.g. "monet").
+
+    Returns:
+        str: The model name used by CycleGAN (e.g. "style_monet_pretrained").
+    """
+
+    return f"style_{style}_pretrained"
+
+
+def split_cores(workers):
+    """
+    Splits the CPU cores available to the process into contiguous sets, one per concurrent worker.
+
+    Parameters:
+        workers (int): The number of concurrent workers.
+
+    Returns:
+        list[list[int]]: One list of core indices per worker (fewer lists if there are fewer cores).
+    """
+
+    # Cores the process may run on (all cores where affinity is not supported, e.g. Windows and macOS)
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+
+    # Distribute the cores as evenly as possible, the first workers get the remaining cores
+    workers = max(1, min(workers, len(cores)))
+    size, remainder = divmod(len(cores), workers)
+    core_sets, start = [], 0
+    for worker in range(workers):
+        end = start + size + (1 if worker < remainder else 0)
+        core_sets.append(cores[start:end])
+        start = end
+    return core_sets
+
+
+def use_cores(cores):
+    """
+    Runs the torch inference of the calling thread on a set of cores: pins the thread to them
+    (Linux only; the intra-op threads it spawns inherit the affinity) and uses one intra-op thread per core.
+
+    Parameters:
+        cores (list[int]): The cores of the thread, as returned by `split_cores`.
+    """
+
+    # Import torch
+    import torch
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    # The intra-op thread count applies to the parallel regions started by the calling thread,
+    # once torch has initialized the thread (otherwise it takes the count last set by any thread)
+    torch.get_num_threads()
+    torch.set_num_threads(len(cores))
+
+
+def scale_images(images, scale):
+    """
+    Resizes preprocessed images, e.g. to stylize a low-resolution preview of them first.
+    The generators are fully convolutional, so they run at any size that is a multiple of 4.
+
+    Parameters:
+        images (Tensor or list[Tensor]): The preprocessed images as returned by `StyleEngine.preprocess`.
+        scale (float): The resize factor (e.g. 0.5 for half the width and height).
+
+    Returns:
+        Tensor or list[Tensor]: The resized images, with sides rounded to a multiple of 4.
+    """
+
+    # Import torch
+    import torch.nn.functional as F
+
+    if isinstance(images, list):
+        return [scale_images(image, scale) for image in images]
+    height, width = (max(4, round(side * scale / 4) * 4) for side in images.shape[-2:])
+    return F.interpolate(images, size=(height, width), mode="bilinear", align_corners=False, antialias=True)
+
+
+# Engine of a worker process and queue of its generated images (see `init_worker_process`)
+worker_engine = None
+worker_cores = None
+worker_images = None
+
+
+def init_worker_process(engine_args, free_core_sets, image_queue):
+    """
+    Initializes a worker process of an engine: takes a free core set for the lifetime of the
+    process and creates the engine that runs the styles in it.
+
+    Parameters:
+        engine_args (tuple): The styles, batch size, workers and extra args of the parent engine.
+        free_core_sets (Queue): Core sets not taken by another worker process.
+        image_queue (Queue): Queue sending the generated images to the parent process.
+    """
+
+    global worker_engine, worker_cores, worker_images
+    worker_engine = StyleEngine(*engine_args)
+    worker_cores = free_core_sets.get()
+    worker_images = image_queue
+
+
+def preload_worker_process():
+    """
+    Starts loading the models of all styles in the background of a worker process.
+    """
+
+    worker_engine.preload()
+
+
+def run_style_in_worker_process(style, images, workers, indices=None):
+    """
+    Runs one style in a worker process. The generated images are sent to the parent process as
+    (style, index, image) tuples, followed by (style, None, None) once the style is done.
+
+    Parameters:
+        style (str): The style to apply.
+        images (Tensor or list[Tensor]): The preprocessed images as returned by `preprocess`.
+        workers (int): Number of worker processes sharing the memory.
+        indices (list or None): Indices of the images to process. All images if None.
+    """
+
+    free_core_sets = queue.Queue()
+    free_core_sets.put(worker_cores)
+    try:
+        worker_engine.run_style(style, images, free_core_sets, workers,
+                                lambda style, index, image: worker_images.put((style, index, image)), indices)
+    finally:
+        worker_images.put((style, None, None))
+
+
+class StyleEngine:
+    """
+    Keeps one CycleGAN TestModel per style in memory and applies them to images.
+    The models are loaded lazily on first use (or in the background with `preload`),
+    so the engine can be created by the app at startup without blocking the GUI.
+    """
+
+    def __init__(self, styles=STYLES, batch_size=0, workers=0, extra_args=(), processes=False, fuse=False,
+                 autotune=False):
+        """
+        Initializes the engine without loading any model.
+
+        Parameters:
+            styles (list): List of style names the engine can apply.
+            batch_size (int): Number of images per forward pass (0 picks it from the available memory).
+            workers (int): Number of styles run concurrently (0 runs all styles at once if there are enough cores).
+            extra_args (list): Additional CycleGAN test options, e.g. ['--quantize', 'static'], or
+                               ['--preprocess', 'none', '--tile_size', '512'] for tiled full-resolution images.
+            processes (bool): Whether the styles run in worker processes instead of threads. Each worker
+                              process keeps its own models, reading the weights from the shared page cache.
+                              The tuned backend is not applied then; a backend option in extra_args (e.g.
+                              --jit or --channels_last) copies the weights into every worker process.
+            fuse (bool): Whether the styles run together as one grouped-convolution network (see models/fusion.py),
+                         in the calling thread. Styles whose generators cannot be fused run separately.
+            autotune (bool): Whether the batch size, the workers and the backend left to the engine (0 and no
+                             backend option) come from the configuration tuned for the machine (see autotune.py),
+                             tuned before the first model is loaded if the machine has not been tuned yet.
+        """
+
+        self.styles = list(styles)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.extra_args = list(extra_args)
+        self.models = {}
+        self.options = {}
+        self.model_hashes = {}
+        # Protects the shared dictionaries (options, models and hashes) between worker threads
+        self.lock = threading.Lock()
+        # Serializes the loading of each model, different styles load concurrently
+        self.load_locks = {style: threading.Lock() for style in self.styles}
+        # Serializes inference per style, as a model keeps the current input and output as attributes
+        self.style_locks = {style: threading.Lock() for style in self.styles}
+        # Worker processes, started on first use, and the queue of the images they generate
+        self.processes = processes
+        self.process_pool = None
+        self.image_queue = None
+        # Serializes the jobs sent to the worker processes, as they share the image queue
+        self.process_lock = threading.Lock()
+        # Fused generators by tuple of styles, and the lock serializing their inference
+        self.fuse = fuse
+        self.fused_models = {}
+        self.fused_lock = threading.Lock()
+        # Tuned configuration of the machine, applied once before the options are built
+        self.autotune = autotune
+        self.tuned = False
+        self.tune_lock = threading.Lock()
+
+    def apply_tuning(self):
+        """
+        Applies the configuration tuned for the machine to the settings left to the engine, once.
+        Tunes the machine first if needed, which takes a while on the first start.
+        """
+
+        if not self.autotune or self.tuned:
+            return
+        # Import the autotuner
+        from utils import autotune
+
+        with self.tune_lock:
+            if self.tuned:
+                return
+            try:
+                config = autotune.get_tuned_config()
+            except Exception:
+                # The engine still runs with its own settings
+                print("Autotune failed:")
+                print(traceback.format_exc())
+            else:
+                self.batch_size = self.batch_size or config["batch_size"]
+                self.workers = self.workers or config["workers"]
+                # Worker processes keep the eager generators, whose weights stay memory-mapped from the
+                # shared page cache; the other backends copy every weight into the memory of each process
+                if not self.processes:
+                    self.extra_args += autotune.get_backend_args(config, self.extra_args)
+                autotune.apply_interop_threads(config)
+            self.tuned = True
+
+    def build_options(self, style):
+        """
+        Builds the CycleGAN test options for a style, as `run_test_script` passes them to `test.py`.
+
+        Parameters:
+            style (str): The style name.
+
+        Returns:
+            Namespace: The parsed CycleGAN options.
+        """
+
+        # Import CycleGAN options (imports torch, so it is only done when the engine is used)
+        from options.test_options import TestOptions
+
+        self.apply_tuning()
+
+        args = [
+            '--dataroot', str(BASE_DIR / "temporary_data"), # Required by the parser, not used by the engine
+            '--name', get_model_name(style), # Model name
+            '--checkpoints_dir', str(CYCLEGAN_DIR / "checkpoints"), # Checkpoints directory
+            '--model', "test", # Specify test mode
+            '--direction', "BtoA", # Specify transformation direction (image to style)
+            '--no_dropout', # Disable dropout for inference
+            '--headless', # Keep only the generated images, in memory
+            '--gpu_ids', "-1", # Use CPU by setting GPU ID to -1
+            '--batch_size', str(self.batch_size), # Images per forward pass
+            '--calibration_dir', str(BASE_DIR / "database" / "examples") # Calibration images for quantization
+        ]
+        opt = TestOptions().parse(args + self.extra_args)
+
+        # Hard-code the same parameters as test.py
+        opt.num_threads = 0
+        opt.serial_batches = True
+        opt.no_flip = True
+        opt.display_id = -1
+        return opt
+
+    def load(self, styles=None):
+        """
+        Creates and loads the models of the given styles if they are not in memory yet.
+        Several styles are loaded concurrently.
+
+        Parameters:
+            styles (list or None): Styles to load. Loads all engine styles if None.
+        """
+
+        styles = list(styles or self.styles)
+        if len(styles) == 1:
+            self.load_style(styles[0])
+        else:
+            with ThreadPoolExecutor(max_workers=len(styles)) as executor:
+                # Raise the first error once all styles are done
+                for future in [executor.submit(self.load_style, style) for style in styles]:
+                    future.result()
+
+    def load_style(self, style):
+        """
+        Creates and loads the model of a style if it is not in memory yet.
+
+        Parameters:
+            style (str): The style to load.
+        """
+
+        # Import CycleGAN model factory
+        from models import create_model
+
+        with self.load_locks[style]:
+            if style in self.models:
+                return
+            with self.lock:
+                opt = self.options.get(style) or self.build_options(style)
+                self.options[style] = opt
+            model = create_model(opt)
+            model.setup(opt)
+            model.eval()
+            with self.lock:
+                self.models[style] = model
+
+    def preload(self):
+        """
+        Starts loading the models of all styles in a background thread (or in every worker
+        process), so that they are ready when the first images are processed.
+        Errors are reported again by `stylize`.
+        """
+
+        if self.processes:
+            threading.Thread(target=self.preload_processes, daemon=True).start()
+        else:
+            threading.Thread(target=self.load, daemon=True).start()
+
+    def preload_processes(self):
+        """
+        Starts the worker processes and the loading of the models in every one of them.
+        """
+
+        executor, workers = self.get_process_pool()
+        for _ in range(workers):
+            executor.submit(preload_worker_process)
+
+    def get_process_pool(self):
+        """
+        Returns the pool of worker processes, started on first use (and again if a worker process died).
+        Every worker process is pinned to its own set of cores.
+
+        Returns:
+            tuple: The ProcessPoolExecutor and its number of worker processes.
+        """
+
+        # Import torch multiprocessing, which sends tensors to the worker processes through shared memory
+        import torch.multiprocessing
+
+        self.apply_tuning()
+        with self.lock:
+            if self.process_pool is None:
+                # Spawned processes do not inherit the threads of the parent (GUI, intra-op pool)
+                context = torch.multiprocessing.get_context("spawn")
+                core_sets = split_cores(self.workers or len(self.styles))
+                free_core_sets = context.Queue()
+                for cores in core_sets:
+                    free_core_sets.put(cores)
+                self.image_queue = context.Queue()
+                engine_args = (self.styles, self.batch_size, self.workers, self.extra_args)
+                self.process_pool = (ProcessPoolExecutor(max_workers=len(core_sets), mp_context=context,
+                                                         initializer=init_worker_process,
+                                                         initargs=(engine_args, free_core_sets, self.image_queue)),
+                                     len(core_sets))
+            return self.process_pool
+
+    def get_model_hash(self, style):
+        """
+        Returns a hash identifying the outputs of a style: the hash of its checkpoint and of the
+        additional options it runs with. Used to key cached results (see result_cache.py).
+
+        Parameters:
+            style (str): The style name.
+
+        Returns:
+            str: The SHA-256 hex digest.
+        """
+
+        # Import CycleGAN helpers
+        from models.jit_cache import file_hash
+
+        self.apply_tuning()
+        with self.lock:
+            if style not in self.model_hashes:
+                opt = self.options.get(style) or self.build_options(style)
+                self.options[style] = opt
+                load_suffix = 'iter_%d' % opt.load_iter if opt.load_iter > 0 else opt.epoch
+                checkpoint_path = os.path.join(opt.checkpoints_dir, opt.name, f"{load_suffix}_net_G{opt.model_suffix}.pth")
+                self.model_hashes[style] = hashlib.sha256(
+                    f"{file_hash(checkpoint_path)}:{' '.join(self.extra_args)}".encode()).hexdigest()
+            return self.model_hashes[style]
+
+    def preprocess(self, images):
+        """
+        Decodes and normalizes the images once, so the same tensor can be fed to every style.
+
+        Parameters:
+            images (list[Path]): Paths of the images to transform.
+
+        Returns:
+            Tensor or list: The preprocessed images stacked into one NCHW tensor, or a list of
+                            1xCxHxW tensors if their sizes differ (e.g. full-resolution images).
+        """
+
+        # Import CycleGAN helpers
+        import torch
+        from PIL import Image
+        from data.base_dataset import get_transform
+
+        # All styles share the same preprocessing options (building them does not load any model)
+        with self.lock:
+            if not self.options:
+                self.options[self.styles[0]] = self.build_options(self.styles[0])
+            transform = get_transform(next(iter(self.options.values())))
+
+        # Load and preprocess the images as the single dataset does
+        tensors = [transform(Image.open(image_path).convert('RGB')) for image_path in images]
+        if len(set(tensor.shape for tensor in tensors)) > 1:
+            return [tensor.unsqueeze(0) for tensor in tensors]
+        return torch.stack(tensors)
+
+    def stylize(self, images, styles=None, on_image=None, on_style=None, indices=None):
+        """
+        Applies the given styles to all images. The styles run concurrently in worker threads
+        (or processes), each pinned to its own set of cores with its share of the intra-op thread budget.
+
+        Parameters:
+            images (list[Path], Tensor or list[Tensor]): Paths of the images to transform, or the
+                                           tensors returned by `preprocess` to share the decoding between calls.
+            styles (list or None): Styles to apply. Applies all engine styles if None.
+            on_image (callable or None): Called as on_image(style, index, image) whenever an image is done.
+            on_style (callable or None): Called as on_style(style, error) whenever a style is done, with
+                                         error None on success or the traceback as a string. If None,
+                                         the first error is raised once all styles are done.
+            indices (dict or None): Maps a style to the indices of the images it is applied to (e.g. the
+                                    images missing from a result cache). All images if None or if a style is missing.
+
+        Returns:
+            dict: Maps each successful style to a list of RGB uint8 numpy arrays, in the order of its images.
+        """
+
+        styles = styles or self.styles
+        self.apply_tuning()
+
+        # Decode and normalize each image only once for all styles
+        if isinstance(images, list) and isinstance(images[0], (str, Path)):
+            images = self.preprocess(images)
+
+        # Styles without any image to process are done without loading their model
+        indices = indices or {}
+        results, errors = {}, []
+        for style in styles:
+            if style in indices and len(indices[style]) == 0:
+                results[style] = []
+                if on_style is not None:
+                    on_style(style, None)
+        styles = [style for style in styles if style not in results]
+        if self.processes:
+            self.run_processes(images, styles, on_image, on_style, indices, results)
+            return results
+        fused = self.get_fused_model(styles) if self.fuse and len(styles) > 1 else None
+        if fused is not None:
+            self.run_fused(fused, images, styles, on_image, on_style, indices, results)
+            return results
+
+        # Divide the cores between the workers, each worker takes a free core set for every style it runs
+        core_sets = split_cores(self.workers or len(styles))
+        free_core_sets = queue.Queue()
+        for cores in core_sets:
+            free_core_sets.put(cores)
+
+        with ThreadPoolExecutor(max_workers=len(core_sets)) as executor:
+            futures = {style: executor.submit(self.run_style, style, images, free_core_sets, len(core_sets), on_image,
+                                              indices.get(style))
+                       for style in styles}
+            for style, future in futures.items():
+                try:
+                    results[style] = future.result()
+                except Exception as e:
+                    if on_style is None:
+                        errors.append(e)
+                    else:
+                        on_style(style, "".join(traceback.format_exception(type(e), e, e.__traceback__)))
+                else:
+                    if on_style is not None:
+                        on_style(style, None)
+
+        # Without a style callback, errors are raised to the caller
+        if errors:
+            raise errors[0]
+        return results
+
+    def run_processes(self, images, styles, on_image, on_style, indices, results):
+        """
+        Applies the given styles in the worker processes, see `stylize`.
+        The generated images are collected into `results` as the worker processes send them.
+        """
+
+        with self.process_lock:
+            executor, workers = self.get_process_pool()
+            outputs = {style: [] for style in styles}
+            futures = {style: executor.submit(run_style_in_worker_process, style, images, workers, indices.get(style))
+                       for style in styles}
+
+            errors, pending = [], set(styles)
+            while pending:
+                try:
+                    style, index, image = self.image_queue.get(timeout=0.1)
+                except queue.Empty:
+                    # A worker process that died never reports the end of its style
+                    style = next((style for style in pending if futures[style].done()
+                                  and isinstance(futures[style].exception(), BrokenProcessPool)), None)
+                    if style is None:
+                        continue
+                    index = None
+                if index is not None:
+                    outputs[style].append(image)
+                    if on_image is not None:
+                        on_image(style, index, image)
+                    continue
+
+                # The style is done, its result follows its last image
+                pending.discard(style)
+                try:
+                    futures[style].result()
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool) and self.process_pool is not None:
+                        # Release the remaining worker processes and queued calls of the broken pool
+                        # (shutdown(cancel_futures=True) needs Python 3.9)
+                        for future in futures.values():
+                            future.cancel()
+                        executor.shutdown(wait=False)
+                        self.process_pool = None
+                    if on_style is None:
+                        errors.append(e)
+                    else:
+                        on_style(style, "".join(traceback.format_exception(type(e), e, e.__traceback__)))
+                else:
+                    results[style] = outputs[style]
+                    if on_style is not None:
+                        on_style(style, None)
+
+        # Without a style callback, errors are raised to the caller
+        if errors:
+            raise errors[0]
+
+    def get_fused_model(self, styles):
+        """
+        Returns the fused generator of the given styles, built on first use.
+
+        Parameters:
+            styles (list): The styles to fuse, in the order of the fused outputs.
+
+        Returns:
+            FusedGenerator or None: The fused generator, or None if the generators cannot be fused (e.g. quantized,
+                                    TorchScript or ONNX generators, generators running in bfloat16 or channels-last,
+                                    which the fused forward pass would drop, or a model failing to load; the styles
+                                    then run separately and report their errors).
+        """
+
+        # Import CycleGAN fusion
+        from models import fusion
+
+        key = tuple(styles)
+        try:
+            self.load(styles)
+        except Exception:
+            return None
+        with self.lock:
+            if key not in self.fused_models:
+                models = [self.models[style] for style in styles]
+                nets = [model.netG for model in models]
+                # The fused pass runs fp32 in the default memory format, so per-style settings would be lost
+                keeps_settings = not any(getattr(model, "bf16", False) or getattr(model, "channels_last", False)
+                                         for model in models)
+                self.fused_models[key] = fusion.fuse_generators(nets) if keeps_settings and fusion.can_fuse(nets) else None
+            return self.fused_models[key]
+
+    def run_fused(self, fused, images, styles, on_image, on_style, indices, results):
+        """
+        Applies the given styles with one forward pass per batch through their fused generator, see `stylize`.
+        """
+
+        # Import CycleGAN helpers
+        import torch
+        from util import util
+        from models import tiling
+
+        # Images needed by at least one style, each style only reports its own
+        wanted = {style: set(range(len(images))) if indices.get(style) is None else set(indices[style]) for style in styles}
+        selected = sorted(set().union(*wanted.values()))
+        outputs = {style: [] for style in styles}
+        opt = self.options[styles[0]]
+
+        try:
+            with self.fused_lock, torch.no_grad():
+                # All cores of the process run the fused layers
+                use_cores(split_cores(1)[0])
+                if isinstance(images, list):
+                    # Images of different sizes run one by one
+                    batch_size, batches = 1, [images[index] for index in selected]
+                else:
+                    # The activations of all styles are held at once
+                    batch_size = util.get_batch_size(opt, len(selected), memory_fraction=0.25 / len(styles))
+                    batches = [images[selected[start:start + batch_size]] for start in range(0, len(selected), batch_size)]
+                for start, batch in zip(range(0, len(selected), batch_size), batches):
+                    if opt.tile_size > 0:
+                        tile_batch_size = opt.tile_batch_size or util.get_batch_size(
+                            opt, tiling.count_tiles(batch.shape[2], batch.shape[3], opt.tile_size, opt.tile_overlap),
+                            memory_fraction=0.25 / len(styles), image_size=opt.tile_size)
+                        fake = tiling.tiled_forward(fused.net, batch, opt.tile_size, opt.tile_overlap, tile_batch_size)
+                        fake = fake.view(fake.shape[0], len(styles), -1, *fake.shape[2:])
+                    else:
+                        fake = fused(batch)
+                    # Convert the outputs of each style at once
+                    style_images = [util.tensors2im(fake[:, j]) for j in range(len(styles))]
+                    for i, index in enumerate(selected[start:start + len(batch)]):
+                        for j, style in enumerate(styles):
+                            if index in wanted[style]:
+                                outputs[style].append(style_images[j][i])
+                                if on_image is not None:
+                                    on_image(style, index, outputs[style][-1])
+        except Exception as e:
+            # Without a style callback, errors are raised to the caller
+            if on_style is None:
+                raise
+            error = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+            for style in styles:
+                on_style(style, error)
+            return
+
+        for style in styles:
+            results[style] = outputs[style]
+            if on_style is not None:
+                on_style(style, None)
+
+    def run_style(self, style, images, free_core_sets, workers, on_image=None, indices=None):
+        """
+        Runs one style on all (or the selected) images in the calling worker thread.
+
+        Parameters:
+            style (str): The style to apply.
+            images (Tensor or list[Tensor]): The preprocessed images as returned by `preprocess`.
+            free_core_sets (Queue): Core sets not used by another worker; one is taken while the style runs.
+            workers (int): Number of concurrent workers sharing the memory.
+            on_image (callable or None): Called as on_image(style, index, image) whenever an image is done.
+            indices (list or None): Indices of the images to process. All images if None.
+
+        Returns:
+            list: The RGB uint8 numpy arrays of the generated images, in the order of the processed images.
+        """
+
+        # Import CycleGAN helpers
+        from util import util
+
+        # Select the images to process, on_image still reports their index in `images`
+        if indices is None:
+            indices = list(range(len(images)))
+        elif isinstance(images, list):
+            images = [images[index] for index in indices]
+        else:
+            images = images[list(indices)]
+
+        cores = free_core_sets.get()
+        try:
+            use_cores(cores)
+
+            # Load the model if it is not preloaded (an onnxruntime generator runs in a session created
+            # for the thread count of the calling thread, see models/onnx_backend.py)
+            self.load([style])
+
+            with self.style_locks[style]:
+                model = self.models[style]
+                # Concurrent styles share the memory available for the batches (of images or of tiles)
+                model.memory_fraction = 0.25 / workers
+                if isinstance(images, list):
+                    # Images of different sizes run one by one, their tiles are batched by the model
+                    batch_size, batches = 1, images
+                else:
+                    # Run inference on slices of the shared tensor
+                    batch_size = util.get_batch_size(self.options[style], len(images), memory_fraction=0.25 / workers)
+                    batches = [images[start:start + batch_size] for start in range(0, len(images), batch_size)]
+                outputs = []
+                for start, batch in zip(range(0, len(images), batch_size), batches):
+                    # Split the generated images back per input
+                    model.set_input({'A': batch, 'A_paths': []})
+                    model.test()
+                    fake = model.get_current_visuals()['fake']
+                    for i, image in enumerate(util.tensors2im(fake)):
+                        outputs.append(image)
+                        if on_image is not None:
+                            on_image(style, indices[start + i], outputs[-1])
+                return outputs
+        finally:
+            free_core_sets.put(cores)
@@ -0,0 +1,127 @@
+"""
+This module manages the image groups of the workspace: one folder per image,
+named after its group ID, holding the original and every style of the image as
+<id>_original.png and <id>_<style>.png.
+
+A group is allocated as soon as an image is uploaded (or captured), and the
+original is written straight to its final file name. Until the image is
+processed, its group folder is hidden (its name starts with a dot), so the
+workspace and the duplicate search do not show it; processing publishes the
+group by renaming its folder, which moves no file. Every file is written
+under a temporary name and renamed into place, so the GUI never reads a
+partially written image.
+"""
+
+# Import libraries
+import os
+import time
+import uuid
+import shutil
+from pathlib import Path
+
+# Folder of the image groups (relative to the app folder, the working directory of the app)
+WORKSPACE_DIR = Path("database/workspace")
+
+# Prefix of the folders of the groups that are not processed yet
+PENDING_PREFIX = "."
+
+
+def new_group(pending=False):
+    """
+    Allocates a new image group and creates its folder.
+
+    Parameters:
+        pending (bool): Whether the group is hidden until `publish_group` is called.
+
+    Returns:
+        tuple[Path, str]: The folder of the group and its ID.
+    """
+
+    # Time-based IDs keep the newest groups first when sorted by name
+    unique_id = f"{int(time.time_ns())}_{uuid.uuid4().hex[:6]}"
+    group_folder = WORKSPACE_DIR / f"{PENDING_PREFIX if pending else ''}{unique_id}"
+    group_folder.mkdir(parents=True)
+    return group_folder, unique_id
+
+
+def get_group_id(group_folder):
+    """
+    Returns the ID of an image group from its (pending or published) folder.
+    """
+
+    name = Path(group_folder).name
+    return name[len(PENDING_PREFIX):] if name.startswith(PENDING_PREFIX) else name
+
+
+def is_pending(group_folder):
+    """
+    Returns whether a folder is the folder of a pending image group of the workspace.
+    """
+
+    group_folder = Path(group_folder)
+    return group_folder.parent == WORKSPACE_DIR and group_folder.name.startswith(PENDING_PREFIX)
+
+
+def publish_group(group_folder):
+    """
+    Shows a pending image group in the workspace by renaming its folder.
+
+    Parameters:
+        group_folder (Path): The folder of the pending group.
+
+    Returns:
+        Path: The folder of the published group.
+    """
+
+    published_folder = WORKSPACE_DIR / get_group_id(group_folder)
+    os.replace(group_folder, published_folder)
+    return published_folder
+
+
+def discard_pending_groups():
+    """
+    Deletes the pending image groups, e.g. the uploads of a previous session that were never processed.
+    """
+
+    if WORKSPACE_DIR.exists():
+        for group_folder in WORKSPACE_DIR.glob(f"{PENDING_PREFIX}*"):
+            shutil.rmtree(group_folder, ignore_errors=True)
+
+
+def list_groups():
+    """
+    Returns the folders of the published image groups, newest first.
+    """
+
+    if not WORKSPACE_DIR.exists():
+        return []
+    return sorted((folder for folder in WORKSPACE_DIR.iterdir() if folder.is_dir() and not is_pending(folder)),
+                  key=lambda folder: folder.name, reverse=True)
+
+
+def write_file(path, data):
+    """
+    Writes a file atomically: under a temporary name first, then renamed into place.
+
+    Parameters:
+        path (Path): The final path of the file.
+        data (bytes): The content of the file.
+    """
+
+    temp_path = path.with_name(f"{path.name}.tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+
+
+def copy_file(source_path, path):
+    """
+    Copies a file atomically: under a temporary name first, then renamed into place.
+
+    Parameters:
+        source_path (Path): The file to copy.
+        path (Path): The final path of the copy.
+    """
+
+    temp_path = path.with_name(f"{path.name}.tmp")
+    shutil.copyfile(source_path, temp_path)
+    os.replace(temp_path, path)